@@ -0,0 +1,152 @@
+import os
+import asyncio
+from numpy import nan
+import pandas as pd
+import pytest
+from wrapg import aio
+import common
+
+
+test_table = os.environ.get("TEST_TABLE")
+
+
+def test_aio_functions():
+
+    # ================================================
+    #        Async insert/upsert/update/delete/query
+    #
+    # - concurrent calls share one async pool
+    # - async generator consumed in chunks
+    # ================================================
+
+    common.clear_table(test_table)
+    common.drop_index(test_table, ["name"])
+
+    async def heroes(n, age):
+        for i in range(n):
+            yield {"name": f"Hero {i}", "age": age}
+
+    async def run():
+        try:
+            inserted = await asyncio.gather(
+                *(
+                    aio.insert(data={"name": f"Hero {i}", "age": 1}, table=test_table)
+                    for i in range(5)
+                )
+            )
+            assert inserted == [1] * 5
+
+            count = await aio.upsert(
+                data=heroes(8, 2), table=test_table, keys=["name"], batch_size=3
+            )
+            assert count == 8
+
+            assert (
+                await aio.update(
+                    data=[{"name": "Hero 0", "age": 3}], table=test_table, keys=["name"]
+                )
+                == 1
+            )
+            await aio.delete(table=test_table, where={"name": "Hero 7"})
+
+            qry = (
+                f"SELECT age, count(*) AS n FROM {test_table} GROUP BY age ORDER BY age"
+            )
+            records = list(await aio.query(raw_sql=qry))
+            assert records == [{"age": 2, "n": 6}, {"age": 3, "n": 1}]
+
+            df = await aio.query(raw_sql=qry, to_df=True)
+            assert df["n"].tolist() == [6, 1]
+
+            assert len(aio.pool_stats()) == 1
+        finally:
+            await aio.close_pools()
+
+    asyncio.run(run())
+
+    common.drop_index(test_table, ["name"])
+    common.clear_table(test_table)
+
+
+def test_aio_copy_from_csv(tmp_path):
+
+    # ================================================
+    #      Async copy_from_csv() split into pieces
+    # ================================================
+
+    common.clear_table(test_table)
+
+    header = "age,superhero,bike,name,ts\n"
+    lines = "".join(f"{i},Hero {i},,Name {i},\n" for i in range(50))
+    (tmp_path / "heroes.csv").write_text(header + lines)
+
+    async def run():
+        try:
+            return await aio.copy_from_csv(
+                table=test_table,
+                csv_file=tmp_path / "heroes.csv",
+                header=True,
+                workers=2,
+                split=True,
+            )
+        finally:
+            await aio.close_pools()
+
+    stats = asyncio.run(run())
+    assert sum(s["rows"] for s in stats) == 50
+
+    common.clear_table(test_table)
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_aio_insert_copy_nan_int(binary):
+
+    # ================================================
+    #     Async insert(method="copy") NaN filled int column
+    #
+    # - dataframe & dict rows, float 4.0 copied into int column
+    # ================================================
+
+    common.clear_table(test_table)
+
+    df = pd.DataFrame({"age": [4.0, nan], "name": ["Ethan", "Matthew"]})
+    rows = [{"age": 10.0, "name": "James"}]
+
+    async def run():
+        try:
+            count = await aio.insert(
+                data=df, table=test_table, method="copy", binary=binary
+            )
+            count += await aio.insert(
+                data=rows, table=test_table, method="copy", binary=binary
+            )
+            qry = f"SELECT name, age FROM {test_table} ORDER BY name"
+            return count, await aio.query(raw_sql=qry)
+        finally:
+            await aio.close_pools()
+
+    count, records = asyncio.run(run())
+    assert count == 3
+    assert list(records) == [
+        {"name": "Ethan", "age": 4},
+        {"name": "James", "age": 10},
+        {"name": "Matthew", "age": None},
+    ]
+
+    common.clear_table(test_table)
+
+
+def test_aio_upsert_unsupported():
+
+    # ================================================
+    #   Async upsert() rejects sync only staging paths
+    # ================================================
+
+    async def run(**kwargs):
+        return await aio.upsert(
+            data={"name": "Ethan"}, table=test_table, keys=["name"], **kwargs
+        )
+
+    for kwargs in ({"use_index": False}, {"method": "copy"}, {"engine": "merge"}):
+        with pytest.raises(ValueError):
+            asyncio.run(run(**kwargs))
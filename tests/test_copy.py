@@ -0,0 +1,362 @@
+import gzip
+import io
+import os
+from datetime import datetime
+from numpy import nan
+import pandas as pd
+import pytest
+from wrapg import wrapg, pool, catalog
+import common
+
+
+test_table = os.environ.get("TEST_TABLE")
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_insert_copy(binary):
+
+    # ================================================
+    #           Insert() with method="copy"
+    #
+    # - dataframe & list of dict copied to table
+    # - NaN values copied as NULL
+    # ================================================
+
+    common.clear_table(test_table)
+
+    df = pd.DataFrame(
+        {
+            "age": pd.array([4, None], dtype="Int64"),
+            "superhero": ["Captain America", "Iron Man"],
+            "name": ["Ethan", "Matthew"],
+            "ts": [datetime(2022, 1, 1, 7, 0), datetime(2022, 4, 1, 7, 0)],
+        }
+    )
+    count = wrapg.insert(data=df, table=test_table, method="copy", binary=binary)
+    assert count == 2
+
+    data = [{"age": 10, "name": "James", "superhero": nan}]
+    assert wrapg.insert(data=data, table=test_table, method="copy", binary=binary) == 1
+
+    qry = f"SELECT name, age, superhero FROM {test_table} ORDER BY age"
+    records = list(wrapg.query(raw_sql=qry))
+
+    assert records == [
+        {"name": "Ethan", "age": 4, "superhero": "Captain America"},
+        {"name": "James", "age": 10, "superhero": None},
+        {"name": "Matthew", "age": None, "superhero": "Iron Man"},
+    ]
+
+    common.clear_table(test_table)
+
+
+def test_insert_default_nan_int():
+
+    # ================================================
+    #     Insert() > copy_threshold rows, default method
+    #
+    # - NaN makes int column float64 (4.0)
+    # - default executemany, postgres casts 4.0 to int
+    # ================================================
+
+    common.clear_table(test_table)
+
+    n_rows = wrapg.copy_threshold + 1
+    df = pd.DataFrame(
+        {
+            "age": [4.0] * (n_rows - 1) + [nan],
+            "name": ["Ethan"] * n_rows,
+        }
+    )
+    assert df["age"].dtype == "float64"
+    assert wrapg.insert(data=df, table=test_table) == n_rows
+
+    qry = f"SELECT count(age) AS ages, sum(age) AS total FROM {test_table}"
+    assert list(wrapg.query(raw_sql=qry)) == [{"ages": n_rows - 1, "total": 40_000}]
+
+    common.clear_table(test_table)
+
+
+def test_copy_to_csv(tmp_path):
+
+    # ================================================
+    #        Copy_to_csv() table & query to file
+    #
+    # - gzip inferred from file extension
+    # - query with params to file-like object
+    # ================================================
+
+    common.clear_table(test_table)
+
+    data = [{"age": 4, "name": "Ethan"}, {"age": 33, "name": "Matthew"}]
+    wrapg.insert(data=data, table=test_table)
+
+    file = tmp_path / "heroes.csv.gz"
+    assert wrapg.copy_to_csv(source=test_table, file=file) == 2
+
+    with gzip.open(file, "rt") as f:
+        lines = f.read().splitlines()
+    assert lines[0] == "age,superhero,bike,name,ts"
+    assert len(lines) == 3
+
+    buffer = io.StringIO()
+    qry = f"SELECT name FROM {test_table} WHERE age > %s ORDER BY name;"
+    count = wrapg.copy_to_csv(source=qry, file=buffer, header=False, params=(10,))
+    assert count == 1
+    assert buffer.getvalue() == "Matthew\n"
+
+    common.clear_table(test_table)
+
+
+def test_copy_from_csv_parallel(tmp_path):
+
+    # ================================================
+    #     Copy_from_csv() split file & glob, parallel
+    #
+    # - one file split at line boundaries into pieces
+    # - glob of files, header skipped in each file
+    # ================================================
+
+    common.clear_table(test_table)
+
+    header = "age,superhero,bike,name,ts\n"
+    lines = "".join(f"{i},Hero {i},,Name {i},\n" for i in range(100))
+    (tmp_path / "heroes_0.csv").write_text(header + lines)
+    (tmp_path / "heroes_1.csv").write_text(header + "1000,Batman,,Bruce,\n")
+
+    qry = f"SELECT count(*) AS n, count(DISTINCT age) AS d FROM {test_table}"
+
+    stats = wrapg.copy_from_csv(
+        table=test_table,
+        csv_file=tmp_path / "heroes_0.csv",
+        header=True,
+        workers=3,
+        split=True,
+    )
+    assert len(stats) == 3
+    assert sum(s["rows"] for s in stats) == 100
+    assert list(wrapg.query(raw_sql=qry)) == [{"n": 100, "d": 100}]
+
+    common.clear_table(test_table)
+
+    stats = wrapg.copy_from_csv(
+        table=test_table,
+        csv_file=str(tmp_path / "heroes_*.csv"),
+        header=True,
+        workers=2,
+    )
+    assert [s["rows"] for s in stats] == [100, 1]
+    assert list(wrapg.query(raw_sql=qry)) == [{"n": 101, "d": 101}]
+
+    common.clear_table(test_table)
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_copy_from_dataframe(binary):
+
+    # ================================================
+    #       Copy_from_dataframe() in small chunks
+    #
+    # - NaN/NA copied as NULL, empty string kept
+    # - quotes & commas survive csv serialization
+    # ================================================
+
+    common.clear_table(test_table)
+
+    df = pd.DataFrame(
+        {
+            "age": pd.array([4, None, 10], dtype="Int64"),
+            "superhero": ['Captain "America"', "", nan],
+            "name": ["Ethan", "Matthew, Jr", "James"],
+            "ts": [datetime(2022, 1, 1, 7, 0), pd.NaT, datetime(2022, 4, 1, 7, 0)],
+        }
+    )
+    count = wrapg.copy_from_dataframe(
+        df=df, table=test_table, binary=binary, chunk_size=2
+    )
+    assert count == 3
+
+    qry = f"SELECT name, age, superhero, ts FROM {test_table} ORDER BY name"
+    records = list(wrapg.query(raw_sql=qry))
+
+    assert records == [
+        {
+            "name": "Ethan",
+            "age": 4,
+            "superhero": 'Captain "America"',
+            "ts": datetime(2022, 1, 1, 7, 0),
+        },
+        {"name": "James", "age": 10, "superhero": None, "ts": datetime(2022, 4, 1, 7)},
+        {"name": "Matthew, Jr", "age": None, "superhero": "", "ts": None},
+    ]
+
+    common.clear_table(test_table)
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_copy_from_dataframe_nan_int(binary):
+
+    # ================================================
+    #     Copy_from_dataframe() of NaN filled int column
+    #
+    # - float64 column (4.0, NaN) copied into int column
+    # - df itself left as float64
+    # ================================================
+
+    common.clear_table(test_table)
+
+    df = pd.DataFrame({"age": [4.0, nan, 10.0], "name": ["Ethan", "Matthew", "James"]})
+    count = wrapg.copy_from_dataframe(df=df, table=test_table, binary=binary)
+    assert count == 3
+    assert df["age"].dtype == "float64"
+
+    qry = f"SELECT name, age FROM {test_table} ORDER BY name"
+    assert list(wrapg.query(raw_sql=qry)) == [
+        {"name": "Ethan", "age": 4},
+        {"name": "James", "age": 10},
+        {"name": "Matthew", "age": None},
+    ]
+
+    common.clear_table(test_table)
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_copy_from_arrow(binary):
+
+    # ================================================
+    #     Copy_from_dataframe() of arrow & polars
+    #
+    # - nulls copied as NULL, empty string kept
+    # - polars upsert staged from arrow buffers
+    # ================================================
+
+    pa = pytest.importorskip("pyarrow")
+
+    common.clear_table(test_table)
+
+    table = pa.table(
+        {
+            "age": [4, None, 10],
+            "superhero": ['Captain "America"', "", None],
+            "name": ["Ethan", "Matthew, Jr", "James"],
+            "ts": [datetime(2022, 1, 1, 7, 0), None, datetime(2022, 4, 1, 7, 0)],
+        }
+    )
+    count = wrapg.copy_from_dataframe(
+        df=table, table=test_table, binary=binary, chunk_size=2
+    )
+    assert count == 3
+
+    qry = f"SELECT name, age, superhero, ts FROM {test_table} ORDER BY name"
+    assert list(wrapg.query(raw_sql=qry)) == [
+        {
+            "name": "Ethan",
+            "age": 4,
+            "superhero": 'Captain "America"',
+            "ts": datetime(2022, 1, 1, 7, 0),
+        },
+        {"name": "James", "age": 10, "superhero": None, "ts": datetime(2022, 4, 1, 7)},
+        {"name": "Matthew, Jr", "age": None, "superhero": "", "ts": None},
+    ]
+
+    pl = pytest.importorskip("polars")
+
+    # record batch inserted by executemany, polars upserted thru staging
+    wrapg.insert(data=table.to_batches()[0].slice(0, 1), table=test_table)
+    count = wrapg.upsert(
+        data=pl.DataFrame({"name": ["Matthew, Jr", "Bruce"], "age": [5, 40]}),
+        table=test_table,
+        keys=["name"],
+        use_index=False,
+        binary=binary,
+    )
+    assert (count.updated, count.inserted) == (1, 1)
+
+    qry = f"SELECT count(*) AS n FROM {test_table}"
+    assert list(wrapg.query(raw_sql=qry)) == [{"n": 5}]
+
+    common.clear_table(test_table)
+
+
+@pytest.mark.parametrize("atomic", [False, True])
+def test_insert_workers(atomic):
+
+    # ================================================
+    #       Insert() split over parallel workers
+    #
+    # - list & dataframe split in slices, one per worker
+    # - atomic=True; failed slice rolls back all slices
+    # - commit_every with workers raises ValueError
+    # ================================================
+
+    common.clear_table(test_table)
+
+    data = [{"age": i, "name": f"Hero {i}"} for i in range(30)]
+    assert wrapg.insert(data=data, table=test_table, workers=3, atomic=atomic) == 30
+
+    df = pd.DataFrame(data)
+    count = wrapg.insert(
+        data=df, table=test_table, method="copy", workers=4, atomic=atomic
+    )
+    assert count == 30
+
+    qry = f"SELECT count(*) AS n FROM {test_table}"
+    assert list(wrapg.query(raw_sql=qry)) == [{"n": 60}]
+
+    # last slice fails on unknown column
+    bad = data[:8] + [{"not_a_column": 1}]
+    with pytest.raises(Exception):
+        wrapg.insert(data=bad, table=test_table, workers=3, atomic=atomic)
+
+    # independent slices keep 6 rows of first two slices
+    expected = 60 if atomic else 66
+    assert list(wrapg.query(raw_sql=qry)) == [{"n": expected}]
+
+    # batches commit in order, can not run in parallel
+    with pytest.raises(ValueError):
+        wrapg.insert(data=data, table=test_table, workers=3, commit_every=10)
+
+    common.clear_table(test_table)
+
+
+def test_copy_binary_schema_cache():
+
+    # ================================================
+    #      Binary copy types from cached schema
+    #
+    # - schema read once, served from cache until ttl
+    # - unknown column raises before copy starts
+    # ================================================
+
+    common.clear_table(test_table)
+    catalog.invalidate()
+
+    record = {"name": "Ethan", "age": 4, "ts": datetime(2022, 1, 1, 7, 0)}
+    for _ in range(3):
+        wrapg.insert(data=[record], table=test_table, method="copy", binary=True)
+    assert catalog.cache_info()["schemas"] == 1
+
+    with pool.connection(wrapg.conn_import) as conn:
+        schema = catalog.table_schema(conn, test_table)
+        assert schema["age"][1] == "integer"
+        assert catalog.column_types(conn, test_table, ["age", "name"]) == [
+            schema["age"][0],
+            schema["name"][0],
+        ]
+
+        # expired schema read again from catalog
+        catalog.schema_ttl = 0
+        try:
+            assert catalog.cached_schema(conn, test_table) is None
+        finally:
+            catalog.schema_ttl = 300.0
+
+    with pytest.raises(ValueError):
+        wrapg.insert(
+            data=[{"not_a_column": 1}], table=test_table, method="copy", binary=True
+        )
+
+    assert len(list(wrapg.query(raw_sql=f"SELECT * FROM {test_table}"))) == 3
+
+    common.clear_table(test_table)
+
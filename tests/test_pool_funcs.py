@@ -0,0 +1,60 @@
+import time
+import psycopg
+import pytest
+from wrapg import wrapg, pool, session
+
+
+# Note: run test using -m flag
+# pipenv run python -m pytest -vv
+
+
+def test_pool_key():
+    params1 = {"user": "postgres", "host": "localhost", "port": None}
+    # note order and None values should not matter
+    params2 = {"host": "localhost", "user": "postgres"}
+
+    assert pool.pool_key(params1) == pool.pool_key(params2)
+    assert pool.pool_key(params1) != pool.pool_key({**params2, "dbname": "sales"})
+
+
+def test_pool_reuse():
+    pool.close_pools()
+
+    wrapg.query(raw_sql="SELECT 1 AS one")
+    wrapg.query(raw_sql="SELECT 2 AS two")
+
+    # both queries share one pool, one connection was requested twice
+    stats = pool.pool_stats()
+    assert len(stats) == 1
+    assert list(stats.values())[0]["requests_num"] == 2
+
+
+def test_prepared_statements():
+    # new connections prepare statements on first execute
+    pool.close_pools()
+    pool.prepare_config["prepare_threshold"] = 0
+
+    try:
+        with session.connect() as s:
+            before = s.prepared_statements()
+            s.query(raw_sql="SELECT 1 AS one")
+            s.query(raw_sql="SELECT 1 AS one")
+
+            # query prepared once and reused by second call
+            assert s.prepared_statements() - before == 1
+    finally:
+        pool.prepare_config["prepare_threshold"] = 5
+        pool.close_pools()
+
+
+def test_pool_bad_connection():
+    pool.close_pools()
+
+    # unknown database raises right away, not PoolTimeout after pool timeout
+    start = time.perf_counter()
+    with pytest.raises(psycopg.OperationalError):
+        wrapg.query(raw_sql="SELECT 1", conn_kwargs={"dbname": "wrapg_no_such_db"})
+    assert time.perf_counter() - start < pool.pool_config["timeout"]
+
+    # no pool kept for bad connection parameters
+    assert pool.pool_stats() == {}
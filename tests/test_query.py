@@ -0,0 +1,107 @@
+import os
+import pandas as pd
+import pytest
+from wrapg import wrapg
+import common
+
+
+test_table = os.environ.get("TEST_TABLE")
+
+
+def test_query_stream():
+
+    # ================================================
+    #           Query() with stream=True
+    #
+    # - rows fetched lazily from server side cursor
+    # - to_df=True yields dataframe per itersize rows
+    # ================================================
+
+    common.clear_table(test_table)
+
+    data = [{"age": i, "name": f"Hero {i}"} for i in range(5)]
+    wrapg.insert(data=data, table=test_table)
+
+    qry = f"SELECT age, name FROM {test_table} ORDER BY age"
+
+    rows = wrapg.query(raw_sql=qry, stream=True, itersize=2)
+    # generator, not a materialized list
+    assert not isinstance(rows, list)
+    assert list(rows) == data
+
+    dfs = list(wrapg.query(raw_sql=qry, to_df=True, stream=True, itersize=2))
+    assert [len(df) for df in dfs] == [2, 2, 1]
+    assert pd.concat(dfs, ignore_index=True)["name"].tolist() == [
+        d["name"] for d in data
+    ]
+
+    common.clear_table(test_table)
+
+
+def test_query_to_df_dtypes():
+
+    # ================================================
+    #         Query() with to_df=True, typed columns
+    #
+    # - ints with NULL stay nullable ints, not float
+    # - timestamptz keeps timezone, numeric stays Decimal
+    # ================================================
+
+    qry = """SELECT * FROM (VALUES
+        (1, 1.5::float8, true, '2022-01-01 07:00+00'::timestamptz, 1.10::numeric, 'a'),
+        (NULL, NULL, NULL, NULL, NULL, NULL)
+    ) AS t(i, f, b, tstz, n, s)"""
+
+    df = wrapg.query(raw_sql=qry, to_df=True)
+
+    assert str(df["i"].dtype) == "Int32"
+    assert df["i"].isna().tolist() == [False, True]
+    assert str(df["f"].dtype) == "float64"
+    assert str(df["b"].dtype) == "boolean"
+    assert df["tstz"].dt.tz is not None
+    assert df["tstz"].isna().tolist() == [False, True]
+    assert df["n"].dtype == object and str(df["n"][0]) == "1.10"
+    assert df["s"].tolist() == ["a", None]
+
+    # empty result still returns columns
+    empty = wrapg.query(raw_sql=qry + " WHERE false", to_df=True)
+    assert list(empty.columns) == ["i", "f", "b", "tstz", "n", "s"]
+
+
+def test_query_to_arrow():
+
+    # ================================================
+    #           Query() with to_arrow=True
+    #
+    # - arrow types from postgres types, NULL kept
+    # - stream=True yields record batch per itersize rows
+    # ================================================
+
+    pa = pytest.importorskip("pyarrow")
+
+    qry = """SELECT * FROM (VALUES
+        (1, 1.5::float8, true, '2022-01-01 07:00+00'::timestamptz, 1.10::numeric, 'a'),
+        (NULL, NULL, NULL, NULL, NULL, NULL),
+        (3, 2.5::float8, false, '2022-01-02 07:00+00'::timestamptz, 22.25::numeric, 'c')
+    ) AS t(i, f, b, tstz, n, s)"""
+
+    table = wrapg.query(raw_sql=qry, to_arrow=True, itersize=2)
+
+    assert isinstance(table, pa.Table)
+    assert table.schema.field("i").type == pa.int32()
+    assert table.schema.field("f").type == pa.float64()
+    assert table.schema.field("b").type == pa.bool_()
+    assert table.schema.field("tstz").type == pa.timestamp("us", tz="UTC")
+    assert table.schema.field("s").type == pa.string()
+    assert table.column("i").to_pylist() == [1, None, 3]
+    # decimal precision promoted across batches
+    assert [str(v) for v in table.column("n").to_pylist()] == ["1.10", "None", "22.25"]
+
+    batches = list(wrapg.query(raw_sql=qry, to_arrow=True, stream=True, itersize=2))
+    assert [batch.num_rows for batch in batches] == [2, 1]
+    assert batches[0].column_names == ["i", "f", "b", "tstz", "n", "s"]
+
+    empty = wrapg.query(raw_sql=f"{qry} WHERE false", to_arrow=True)
+    assert empty.num_rows == 0
+    assert empty.schema.field("i").type == pa.int32()
+
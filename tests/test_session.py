@@ -0,0 +1,126 @@
+import os
+from datetime import datetime
+import pytest
+from wrapg import wrapg, session
+import common
+
+
+test_table = os.environ.get("TEST_TABLE")
+
+
+def test_session_commit():
+
+    # ================================================
+    #              Session commit on exit
+    #
+    # - records not visible outside session until exit
+    # ================================================
+
+    common.clear_table(test_table)
+
+    data = [
+        {
+            "age": 4,
+            "superhero": "Captain America",
+            "bike": "Speed Bike",
+            "name": "Ethan",
+            "ts": datetime(2022, 1, 1, 7, 0),
+        },
+        {
+            "age": 33,
+            "bike": "Road Bike",
+            "name": "Matthew",
+            "superhero": "Iron Man",
+            "ts": datetime(2022, 4, 1, 7, 0),
+        },
+    ]
+
+    qry = f"SELECT * FROM {test_table}"
+
+    with session.connect() as s:
+        s.insert(data=data[0], table=test_table)
+        # plain function call inside with block joins session
+        wrapg.insert(data=data[1], table=test_table)
+
+        # visible inside session
+        assert list(s.query(raw_sql=qry)) == data
+
+        # not committed yet, different connection sees no records
+        assert (
+            list(wrapg.query(raw_sql=qry, conn_kwargs={"application_name": "t"})) == []
+        )
+
+    # committed on exit
+    assert list(wrapg.query(raw_sql=qry)) == data
+
+    common.clear_table(test_table)
+
+
+def test_session_rollback():
+
+    # ================================================
+    #         Session rollback & savepoints
+    #
+    # - error rolls back all changes in session
+    # - failed call inside savepoint keeps other changes
+    # ================================================
+
+    common.clear_table(test_table)
+
+    record = {"age": 5, "name": "Ethan"}
+    qry = f"SELECT * FROM {test_table}"
+
+    with pytest.raises(ValueError):
+        with session.connect() as s:
+            s.insert(data=record, table=test_table)
+            raise ValueError("abort session")
+
+    assert list(wrapg.query(raw_sql=qry)) == []
+
+    with session.connect(savepoints=True) as s:
+        s.insert(data=record, table=test_table)
+
+        # unknown column fails, only this call is rolled back
+        with pytest.raises(Exception):
+            s.insert(data={"not_a_column": 1}, table=test_table)
+
+    assert len(list(wrapg.query(raw_sql=qry))) == 1
+
+    common.clear_table(test_table)
+
+
+def test_session_stream():
+
+    # ================================================
+    #        Session query(stream=True)
+    #
+    # - stream runs on session connection, sees uncommitted rows
+    # - iterating after session exit raises RuntimeError
+    # ================================================
+
+    common.clear_table(test_table)
+
+    data = [{"age": i, "name": f"Hero {i}"} for i in range(5)]
+    qry = f"SELECT name FROM {test_table} ORDER BY age"
+
+    with session.connect() as s:
+        s.insert(data=data, table=test_table)
+
+        rows = s.query(raw_sql=qry, stream=True, itersize=2)
+        assert [row["name"] for row in rows] == [row["name"] for row in data]
+
+        partial = s.query(raw_sql=qry, stream=True, itersize=2)
+        assert next(partial) == {"name": "Hero 0"}
+
+        unstarted = s.query(raw_sql=qry, stream=True)
+
+    with pytest.raises(RuntimeError):
+        next(partial)
+
+    with pytest.raises(RuntimeError):
+        next(unstarted)
+
+    # committed on exit, cursors closed before commit
+    assert len(list(wrapg.query(raw_sql=qry))) == 5
+
+    common.clear_table(test_table)
@@ -22,7 +22,7 @@ def test_create_index_snip():
 
         assert (
             snipp.as_string(conn)
-            == 'CREATE UNIQUE INDEX "mytable_name_Date(ts)_uix" ON "mytable" ("name", DATE("ts"));'
+            == 'CREATE UNIQUE INDEX IF NOT EXISTS "mytable_name_Date(ts)_uix" ON "mytable" ("name", DATE("ts"));'
             # == 'CREATE UNIQUE INDEX "mytable_name_Date(ts)_uix" ON "mytable" ("name", "ts"::DATE);'
         )
 
@@ -58,6 +58,20 @@ def test_upsert_snip():
         conn.close()
 
 
+def test_insert_snip_positional():
+
+    with connect(**conn_import) as conn:
+
+        snipp = snippet.insert_snip(
+            table="mytable", columns=("name", "age"), positional=True
+        )
+
+        compare = 'INSERT INTO "mytable" ("name", "age") VALUES (%s, %s)'
+        assert snipp.as_string(conn) == compare
+
+        conn.close()
+
+
 def test_update_snip():
 
     # Connect to an existing database
@@ -78,3 +92,56 @@ def test_update_snip():
         assert snipp.as_string(conn) == compare
 
         conn.close()
+
+
+def test_delete_snip():
+
+    with connect(**conn_import) as conn:
+
+        snipp = snippet.delete_snip(
+            table="mytable", where={"name": "Ethan", "MONTH(ts)": 2}
+        )
+
+        compare = 'DELETE FROM "mytable" WHERE "name"=%s AND MONTH("ts")=%s;'
+
+        assert snipp.as_string(conn) == compare
+
+        conn.close()
+
+
+def test_render_snip():
+
+    with connect(**conn_import) as conn:
+
+        snippet.cache_clear()
+
+        params = dict(table="mytable", columns=("name", "age"), keys=["Date(ts)"])
+
+        # first call composes snippet, second served from cache
+        first = snippet.render_snip(conn, "upsert", **params)
+        second = snippet.render_snip(conn, "upsert", **params)
+
+        assert first == snippet.upsert_snip(**params).as_bytes(conn)
+        assert second is first
+        assert snippet.cache_info()["hits"] == 1
+        assert snippet.cache_info()["misses"] == 1
+
+        conn.close()
+
+
+def test_copy_to_snip():
+
+    with connect(**conn_import) as conn:
+
+        # tables named like sql keywords are not queries
+        for table in ("values", "table", "Selection"):
+            snipp = snippet.copy_to_snip(source=table)
+            compare = f'COPY "{table}" TO STDOUT WITH (FORMAT csv, HEADER TRUE)'
+            assert snipp.as_string(conn) == compare
+
+        for qry in ("SELECT 1;", "VALUES (1)", " (select*from t)", "TABLE\nt"):
+            snipp = snippet.copy_to_snip(source=qry, header=False)
+            compare = f"COPY ({qry.strip().rstrip(';')}) TO STDOUT WITH (FORMAT csv, HEADER FALSE)"
+            assert snipp.as_string(conn) == compare
+
+        conn.close()
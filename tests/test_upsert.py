@@ -1,6 +1,10 @@
 import os
 from datetime import datetime
-from wrapg import wrapg
+from concurrent.futures import ThreadPoolExecutor
+from numpy import nan
+import pandas as pd
+import pytest
+from wrapg import wrapg, pool, catalog, session
 import common
 
 
@@ -50,7 +54,13 @@ def test_upsert_noindex():
     ]
 
     # data to upsert using date(ts) key
-    wrapg.upsert(data=upsert_data, table=test_table, keys=["Date(ts)"], use_index=False)
+    count = wrapg.upsert(
+        data=upsert_data, table=test_table, keys=["Date(ts)"], use_index=False
+    )
+
+    # one statement updated matthew & inserted james
+    assert count == 2
+    assert (count.updated, count.inserted) == (1, 1)
 
     # check updated matthew record
     qry = f"SELECT * FROM {test_table} WHERE name='Matthew'"
@@ -133,3 +143,413 @@ def test_upsert_index():
     # clean up for other tests
     common.drop_index(test_table, keys=["Date(ts)"])
     common.clear_table(test_table)
+
+
+def test_upsert_copy():
+
+    # ================================================
+    #        Upsert() with staging table (copy)
+    #
+    # - uses sql date() function in key
+    # - duplicate keys in data, last row is kept
+    # ================================================
+
+    # clear index specified index and table records
+    common.drop_index(test_table, keys=["Date(ts)"])
+    common.clear_table(test_table)
+
+    insert_data = [
+        {
+            "age": 3,
+            "superhero": "Spider-man",
+            "bike": "BMX",
+            "name": "Matthew",
+            "ts": datetime(2022, 4, 1, 7, 0),
+        }
+    ]
+
+    # insert test data
+    wrapg.insert(data=insert_data, table=test_table)
+
+    upsert_data = [
+        {
+            "age": 5,
+            "superhero": "Green Spider",
+            "bike": "BMX",
+            "name": "Matthew",
+            "ts": datetime(2022, 4, 1, 9, 0),
+        },
+        {
+            "age": 7,
+            "superhero": "Gold Spider",
+            "bike": "BMX",
+            "name": "Matthew",
+            "ts": datetime(2022, 4, 1, 11, 0),
+        },
+        {
+            "age": 100,
+            "bike": "New Bike",
+            "name": "James",
+            "superhero": "Batman",
+            "ts": datetime(2022, 8, 1, 8, 0),
+        },
+    ]
+
+    # data to upsert using date(ts) key
+    count = wrapg.upsert(
+        data=upsert_data,
+        table=test_table,
+        keys=["Date(ts)"],
+        exclude_update=["bike"],
+        method="copy",
+    )
+    assert count == 2
+
+    qry = f"SELECT * FROM {test_table} ORDER BY ts"
+    records = list(wrapg.query(raw_sql=qry))
+
+    # check update (last duplicate row) and insert in upsert()
+    assert records == upsert_data[1:]
+
+    # clean up for other tests
+    common.drop_index(test_table, keys=["Date(ts)"])
+    common.clear_table(test_table)
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_upsert_copy_nan_int(binary):
+
+    # ================================================
+    #     Upsert() staging table (copy), NaN int columns
+    #
+    # - float64 (4.0, NaN) & nullable Int64 columns
+    # ================================================
+
+    common.drop_index(test_table, keys=["name"])
+    common.clear_table(test_table)
+
+    wrapg.insert(data={"name": "Ethan", "age": 1}, table=test_table)
+
+    df = pd.DataFrame({"name": ["Ethan", "James"], "age": [4.0, nan]})
+    count = wrapg.upsert(
+        data=df, table=test_table, keys=["name"], method="copy", binary=binary
+    )
+    assert count == 2
+
+    df = pd.DataFrame({"name": ["Matthew"], "age": pd.array([None], dtype="Int64")})
+    wrapg.upsert(data=df, table=test_table, keys=["name"], method="copy", binary=binary)
+
+    qry = f"SELECT name, age FROM {test_table} ORDER BY name"
+    assert list(wrapg.query(raw_sql=qry)) == [
+        {"name": "Ethan", "age": 4},
+        {"name": "James", "age": None},
+        {"name": "Matthew", "age": None},
+    ]
+
+    common.drop_index(test_table, keys=["name"])
+    common.clear_table(test_table)
+
+
+def test_upsert_non_uniform():
+
+    # ================================================
+    #        Upsert() non-uniform data, no index
+    #
+    # - rows with different columns grouped per query
+    # ================================================
+
+    common.clear_table(test_table)
+
+    wrapg.insert(data={"name": "Matthew", "age": 3}, table=test_table)
+
+    upsert_data = [
+        {"name": "Matthew", "age": 7},
+        {"name": "James", "superhero": "Batman"},
+        {"name": "Ethan", "age": 5},
+    ]
+
+    count = wrapg.upsert(
+        data=upsert_data, table=test_table, keys=["name"], use_index=False
+    )
+    assert count == 3
+
+    qry = f"SELECT name, age, superhero FROM {test_table} ORDER BY name"
+    records = list(wrapg.query(raw_sql=qry))
+
+    assert records == [
+        {"name": "Ethan", "age": 5, "superhero": None},
+        {"name": "James", "age": None, "superhero": "Batman"},
+        {"name": "Matthew", "age": 7, "superhero": None},
+    ]
+
+    common.clear_table(test_table)
+
+
+@pytest.mark.parametrize("use_index", [True, False])
+def test_upsert_non_uniform_order(use_index):
+
+    # ================================================
+    #   Upsert/update() same key, different columns
+    #
+    # - rows applied in data order, last row wins
+    # ================================================
+
+    common.drop_index(test_table, ["name"])
+    common.clear_table(test_table)
+
+    data = [
+        {"name": "Ethan", "age": 1},
+        {"name": "Ethan", "age": 5, "superhero": "Captain America"},
+        {"name": "Ethan", "age": 2},
+    ]
+    wrapg.upsert(data=data, table=test_table, keys=["name"], use_index=use_index)
+
+    qry = f"SELECT name, age, superhero FROM {test_table}"
+    assert list(wrapg.query(raw_sql=qry)) == [
+        {"name": "Ethan", "age": 2, "superhero": "Captain America"}
+    ]
+
+    data = [
+        {"name": "Ethan", "age": 7, "superhero": "Iron Man"},
+        {"name": "Ethan", "age": 3},
+    ]
+    wrapg.update(data=data, table=test_table, keys=["name"])
+    assert list(wrapg.query(raw_sql=qry)) == [
+        {"name": "Ethan", "age": 3, "superhero": "Iron Man"}
+    ]
+
+    common.drop_index(test_table, ["name"])
+    common.clear_table(test_table)
+
+
+def test_upsert_generator():
+
+    # ================================================
+    #     Insert/upsert/update() from generators
+    #
+    # - generator consumed in chunks of batch_size
+    # ================================================
+
+    common.clear_table(test_table)
+    common.drop_index(test_table, ["name"])
+
+    def heroes(n, age):
+        for i in range(n):
+            yield {"name": f"Hero {i}", "age": age}
+
+    assert wrapg.insert(data=heroes(7, 1), table=test_table, batch_size=3) == 7
+
+    # 7 existing rows updated, 3 new rows inserted
+    count = wrapg.upsert(
+        data=heroes(10, 2), table=test_table, keys=["name"], batch_size=4
+    )
+    assert count == 10
+
+    count = wrapg.update(
+        data=heroes(5, 3), table=test_table, keys=["name"], batch_size=2
+    )
+    assert count == 5
+
+    qry = f"SELECT age, count(*) AS n FROM {test_table} GROUP BY age ORDER BY age"
+    assert list(wrapg.query(raw_sql=qry)) == [{"age": 2, "n": 5}, {"age": 3, "n": 5}]
+
+    common.drop_index(test_table, ["name"])
+    common.clear_table(test_table)
+
+
+def test_upsert_generator_count():
+
+    # ================================================
+    #     Upsert() generator to merge engine
+    #
+    # - UpsertCount of chunks summed, .updated & .inserted kept
+    # ================================================
+
+    version = wrapg.query(raw_sql="SELECT current_setting('server_version_num')")
+    if int(list(version)[0]["current_setting"]) < 150000:
+        pytest.skip("MERGE requires PostgreSQL 15+")
+
+    common.clear_table(test_table)
+
+    def heroes(n, age):
+        for i in range(n):
+            yield {"name": f"Hero {i}", "age": age}
+
+    wrapg.insert(data=heroes(7, 1), table=test_table)
+
+    # 7 existing rows updated, 3 new rows inserted, 3 chunks
+    count = wrapg.upsert(
+        data=heroes(10, 2),
+        table=test_table,
+        keys=["name"],
+        use_index=False,
+        engine="merge",
+        batch_size=4,
+    )
+    assert count == 10
+    assert (count.updated, count.inserted) == (7, 3)
+
+    common.clear_table(test_table)
+
+
+@pytest.mark.parametrize("binary", [False, True])
+@pytest.mark.parametrize("engine", ["cte", "merge"])
+def test_upsert_noindex_nan_int(engine, binary):
+
+    # ================================================
+    #     Upsert() no index, NaN filled int column
+    #
+    # - float64 column (4.0, NaN) staged into int column
+    # - cte & merge (PostgreSQL 15+) engines
+    # ================================================
+
+    if engine == "merge":
+        version = wrapg.query(raw_sql="SELECT current_setting('server_version_num')")
+        if int(list(version)[0]["current_setting"]) < 150000:
+            pytest.skip("MERGE requires PostgreSQL 15+")
+
+    common.clear_table(test_table)
+
+    wrapg.insert(data={"name": "Ethan", "age": 1}, table=test_table)
+
+    df = pd.DataFrame({"name": ["Ethan", "James"], "age": [4.0, nan]})
+    count = wrapg.upsert(
+        data=df,
+        table=test_table,
+        keys=["name"],
+        use_index=False,
+        engine=engine,
+        binary=binary,
+    )
+    assert (count.updated, count.inserted) == (1, 1)
+
+    qry = f"SELECT name, age FROM {test_table} ORDER BY name"
+    assert list(wrapg.query(raw_sql=qry)) == [
+        {"name": "Ethan", "age": 4},
+        {"name": "James", "age": None},
+    ]
+
+    common.clear_table(test_table)
+
+
+@pytest.mark.parametrize("engine", ["cte", "merge"])
+def test_upsert_noindex_exclude(engine):
+
+    # ================================================
+    #       Upsert() no index with exclude_update
+    #
+    # - excluded columns keep value on update
+    # - duplicate keys in batch, last row wins
+    # - cte & merge (PostgreSQL 15+) engines
+    # ================================================
+
+    if engine == "merge":
+        version = wrapg.query(raw_sql="SELECT current_setting('server_version_num')")
+        if int(list(version)[0]["current_setting"]) < 150000:
+            pytest.skip("MERGE requires PostgreSQL 15+")
+
+    common.clear_table(test_table)
+
+    wrapg.insert(data={"name": "Ethan", "age": 4, "bike": "BMX"}, table=test_table)
+
+    upsert_data = [
+        {"name": "Ethan", "age": 5, "bike": "Road Bike"},
+        {"name": "Ethan", "age": 6, "bike": "Speed Bike"},
+        {"name": "James", "age": 10, "bike": "BMX"},
+        {"name": "James", "age": 11, "bike": "Road Bike"},
+    ]
+    count = wrapg.upsert(
+        data=upsert_data,
+        table=test_table,
+        keys=["name"],
+        exclude_update=["bike"],
+        use_index=False,
+        engine=engine,
+    )
+    assert (count.updated, count.inserted) == (1, 1)
+
+    qry = f"SELECT name, age, bike FROM {test_table} ORDER BY name"
+    assert list(wrapg.query(raw_sql=qry)) == [
+        {"name": "Ethan", "age": 6, "bike": "BMX"},
+        {"name": "James", "age": 11, "bike": "Road Bike"},
+    ]
+
+    common.clear_table(test_table)
+
+
+def test_upsert_index_catalog():
+
+    # ================================================
+    #        Upsert() unique index from catalog
+    #
+    # - missing index created up front & cached
+    # - concurrent writers create index once
+    # - index dropped outside wrapg, stale cache recovers
+    # ================================================
+
+    common.drop_index(test_table, ["name"])
+    common.clear_table(test_table)
+    catalog.invalidate()
+
+    def upsert_one(age):
+        return wrapg.upsert(
+            data={"name": "Ethan", "age": age}, table=test_table, keys=["name"]
+        )
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert list(executor.map(upsert_one, range(8))) == [1] * 8
+
+    with pool.connection(wrapg.conn_import) as conn:
+        assert catalog.cached(conn, test_table, ["name"]) is True
+
+    qry = f"SELECT indexname FROM pg_indexes WHERE tablename = '{test_table}'"
+    assert f"{test_table}_name_uix" in [
+        r["indexname"] for r in wrapg.query(raw_sql=qry)
+    ]
+
+    # cache still lists dropped index, upsert re-reads catalog
+    common.drop_index(test_table, ["name"])
+    assert upsert_one(100) == 1
+
+    common.drop_index(test_table, ["name"])
+    common.clear_table(test_table)
+
+
+
+def test_upsert_index_catalog_rollback():
+
+    # ================================================
+    #     Unique index cache after rollback
+    #
+    # - index created in failed savepoint not left in cache
+    # - index created in rolled back session not left in cache
+    # ================================================
+
+    common.drop_index(test_table, ["name"])
+    common.clear_table(test_table)
+    catalog.invalidate()
+
+    with pool.connection(wrapg.conn_import) as conn:
+        with pytest.raises(ValueError):
+            with conn.transaction(), catalog.unique_index(
+                conn, test_table, ["name"]
+            ) as created:
+                assert created is True
+                raise ValueError("abort savepoint")
+
+        assert catalog.cached(conn, test_table, ["name"]) is None
+
+    with pytest.raises(ValueError):
+        with session.connect() as s:
+            s.upsert(data={"name": "Ethan", "age": 1}, table=test_table, keys=["name"])
+            raise ValueError("abort session")
+
+    with pool.connection(wrapg.conn_import) as conn:
+        assert catalog.cached(conn, test_table, ["name"]) is None
+
+    qry = f"SELECT indexname FROM pg_indexes WHERE tablename = '{test_table}'"
+    assert f"{test_table}_name_uix" not in [
+        r["indexname"] for r in wrapg.query(raw_sql=qry)
+    ]
+
+    common.clear_table(test_table)
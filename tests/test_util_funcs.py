@@ -1,3 +1,6 @@
+import pytest
+import pandas as pd
+from numpy import nan
 from wrapg import util
 
 
@@ -56,3 +59,53 @@ def test_data_transform():
     assert util.data_transform(tup_dict) == (tuple(tup_dict[0]), tup_dict, 2)
     assert util.data_transform(test_dict) == (tuple(test_dict), (test_dict,), 1)
     # TODO: Check more data structures
+
+
+def test_data_transform_positional():
+    df = pd.DataFrame(
+        {
+            "num": pd.array([30, None], dtype="Int64"),
+            "data": ["thirty", nan],
+            "amount": [1.5, nan],
+        }
+    )
+
+    # NaN/NA converted to None per column, df itself unchanged
+    columns, rows, uniform = util.data_transform(df, positional=True)
+    assert columns == ("num", "data", "amount")
+    assert rows == [(30, "thirty", 1.5), (None, None, None)]
+    assert uniform == 1
+    assert df["data"].isna().tolist() == [False, True]
+
+    # default returns dictionaries
+    _, rows, _ = util.data_transform(df)
+    assert rows[1] == {"num": None, "data": None, "amount": None}
+
+
+def test_scan_rows():
+    uniform = [
+        {"num": 30, "name": "pete"},
+        # note order should not matter
+        {"name": "joe", "num": 60},
+    ]
+    # one group, rows not copied
+    groups = util.scan_rows(uniform)
+    assert groups == [(("num", "name"), uniform)]
+    assert groups[0][1] is uniform
+
+    mixed = uniform + [{"num": 80}, {"num": 90, "name": "sr"}]
+    assert util.scan_rows(mixed) == [
+        (("num", "name"), [mixed[0], mixed[1], mixed[3]]),
+        (("num",), [mixed[2]]),
+    ]
+
+    with pytest.raises(BaseException):
+        util.scan_rows(uniform + [(1, 2)])
+
+    # ordered; runs of consecutive rows with same keys, data order kept
+    assert util.scan_rows(mixed, ordered=True) == [
+        (("num", "name"), [mixed[0], mixed[1]]),
+        (("num",), [mixed[2]]),
+        (("num", "name"), [mixed[3]]),
+    ]
+    assert util.scan_rows(uniform, ordered=True)[0][1] is uniform
@@ -1,7 +1,8 @@
 import os
 from psycopg import connect
 from datetime import datetime
-from wrapg import wrapg
+import pytest
+from wrapg import wrapg, session
 import common
 
 
@@ -147,3 +148,73 @@ def test_clear_table():
 
     else:
         raise Exception("No records to run clear table on")
+
+
+def test_insert_commit_every():
+
+    # ================================================
+    #     Insert() in batches with commit_every
+    #
+    # - progress reported per batch, committed per group
+    # - failed group rolled back, resume_from retries rest
+    # - inside session batches join session transaction
+    # ================================================
+
+    common.clear_table(test_table)
+
+    data = [{"name": f"Hero {i}", "age": i} for i in range(10)]
+    qry = f"SELECT count(*) AS n FROM {test_table}"
+
+    reports = []
+    count = wrapg.insert(
+        data=data,
+        table=test_table,
+        batch_size=3,
+        commit_every=6,
+        progress=reports.append,
+    )
+    assert count == 10
+    assert [(r["rows"], r["committed"]) for r in reports] == [
+        (3, 0),
+        (6, 6),
+        (9, 6),
+        (10, 10),
+    ]
+    assert all(r["rows_per_sec"] >= 0 for r in reports)
+
+    common.clear_table(test_table)
+
+    # 8th row fails, first group of 6 rows stays committed
+    bad = data[:7] + [{"not_a_column": 1}] + data[8:]
+    reports = []
+    with pytest.raises(Exception):
+        wrapg.insert(
+            data=iter(bad),
+            table=test_table,
+            batch_size=2,
+            commit_every=6,
+            progress=reports.append,
+        )
+    assert reports[-1]["committed"] == 6
+    assert list(wrapg.query(raw_sql=qry)) == [{"n": 6}]
+
+    wrapg.insert(
+        data=iter(data),
+        table=test_table,
+        batch_size=2,
+        resume_from=reports[-1]["committed"],
+    )
+    assert list(wrapg.query(raw_sql=qry)) == [{"n": 10}]
+
+    common.clear_table(test_table)
+
+    with session.connect() as s:
+        reports = []
+        s.insert(data=data, table=test_table, commit_every=4, progress=reports.append)
+        # nothing committed until session exits
+        assert reports[-1] == {**reports[-1], "rows": 10, "committed": 0}
+
+    assert list(wrapg.query(raw_sql=qry)) == [{"n": 10}]
+
+    common.clear_table(test_table)
+
@@ -4,6 +4,8 @@
 from wrapg.wrapg import (
     query,
     copy_from_csv,
+    copy_to_csv,
+    copy_from_dataframe,
     create_table,
     update,
     upsert,
@@ -12,4 +14,8 @@ from wrapg.wrapg import (
     delete,
     clear_table,
     create_database,
+    prepared_statements,
 )
+from wrapg.pool import pool_stats, close_pools
+from wrapg.session import Session, connect
+from wrapg import aio
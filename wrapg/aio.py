@@ -0,0 +1,760 @@
+import asyncio
+import glob
+import time
+import weakref
+from contextlib import asynccontextmanager
+from collections.abc import Iterable
+import psycopg
+from psycopg import errors
+from psycopg.rows import tuple_row
+from psycopg_pool import AsyncConnectionPool
+from wrapg import wrapg, util, snippet, pool, catalog
+
+
+# ===========================================================================
+#  ?                                aio
+#  @description    :  Async versions of wrapg functions for asyncio apps
+# (FastAPI, aiohttp, ...). Built on psycopg AsyncConnection & async pools,
+# same connection parameters, pool_config & snippets as sync functions.
+# Calls do not block the event loop; many can run concurrently.
+# ===========================================================================
+
+# Async pools are bound to the event loop that opened them;
+# pools kept per loop, keyed by connection parameters
+__loop_pools = weakref.WeakKeyDictionary()
+
+
+async def configure(conn: psycopg.AsyncConnection) -> None:
+    """Apply pool.prepare_config to new connection."""
+    conn.prepare_threshold = pool.prepare_config["prepare_threshold"]
+    conn.prepared_max = pool.prepare_config["prepared_max"]
+
+
+async def get_pool(conn_params: dict) -> AsyncConnectionPool:
+    """Return async pool of running event loop for connection
+    parameters, create pool if none exist yet.
+
+    Args:
+        conn_params (dict): merged conn_import & conn_kwargs
+
+    Returns:
+        AsyncConnectionPool: pool for connection parameters
+    """
+    pools = __loop_pools.setdefault(asyncio.get_running_loop(), {})
+    key = pool.pool_key(conn_params)
+
+    async_pool = pools.get(key)
+    if async_pool is None:
+        async_pool = AsyncConnectionPool(
+            kwargs={k: v for k, v in conn_params.items() if v is not None},
+            # Optional health check before handing connection out
+            check=(
+                AsyncConnectionPool.check_connection if pool.check_on_borrow else None
+            ),
+            configure=configure,
+            name=f"wrapg-aio-{len(pools)}",
+            open=False,
+            **pool.pool_config,
+        )
+        # Stored before first await, other tasks reuse this pool
+        pools[key] = async_pool
+        await async_pool.open()
+
+    return async_pool
+
+
+@asynccontextmanager
+async def connection(conn_params: dict):
+    """Async context manager yielding a connection for connection parameters.
+    Transaction is committed on exit or rolled back on error.
+
+    Args:
+        conn_params (dict): merged conn_import & conn_kwargs
+
+    Yields:
+        AsyncConnection: pooled or new connection (if pool.use_pool is False)
+    """
+    if pool.use_pool is False:
+        conn = await psycopg.AsyncConnection.connect(**conn_params)
+        async with conn:
+            await configure(conn)
+            yield conn
+        return
+
+    async_pool = await get_pool(conn_params)
+    async with async_pool.connection() as conn:
+        yield conn
+
+
+def pool_stats() -> dict:
+    """Return statistics for each async pool of running event loop.
+
+    Returns:
+        dict: {pool name: {metric: value}}
+    """
+    pools = __loop_pools.get(asyncio.get_running_loop(), {})
+    return {async_pool.name: async_pool.get_stats() for async_pool in pools.values()}
+
+
+async def close_pools() -> None:
+    """Close async pools of running event loop; new pools
+    are created on next function call.
+    """
+    pools = __loop_pools.pop(asyncio.get_running_loop(), {})
+    for async_pool in pools.values():
+        await async_pool.close()
+
+
+def _conn_final(conn_kwargs: dict | None) -> dict:
+    """Merge conn_import & conn_kwargs, same as sync functions."""
+    # Initialize conn_kwargs to empty dict if no arguments passed
+    if conn_kwargs is None:
+        conn_kwargs = {}
+
+    return {**wrapg.conn_import, **conn_kwargs}
+
+
+async def _chunks(data, batch_size: int = None):
+    """Yield data as is, or lists of batch_size rows for iterators,
+    generators & async iterables (ie async generators).
+    """
+    size = batch_size or wrapg.stream_batch_size
+
+    if hasattr(data, "__aiter__"):
+        chunk = []
+        async for row in data:
+            chunk.append(row)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    elif util.is_stream(data):
+        for chunk in util.chunked(data, size):
+            yield chunk
+
+    else:
+        yield data
+
+
+async def _column_types(
+    conn: psycopg.AsyncConnection, table: str, columns: Iterable
+) -> list:
+    """Async version of catalog.column_types(); type oid of each column,
+    table schema read from pg_attribute once per catalog.schema_ttl.
+    """
+
+    async def table_schema(refresh: bool = False) -> dict:
+        schema = None if refresh else catalog.cached_schema(conn, table)
+        if schema is not None:
+            return schema
+
+        async with conn.cursor(row_factory=tuple_row) as cur:
+            await cur.execute(query=snippet.table_schema_snip(table=table))
+            rows = await cur.fetchall()
+        return catalog.store_schema(conn, table, rows)
+
+    schema = await table_schema()
+
+    # Column added since schema cached, read again once
+    if catalog.missing_columns(schema, columns):
+        schema = await table_schema(refresh=True)
+
+    missing = catalog.missing_columns(schema, columns)
+    if missing:
+        raise ValueError(f"Column(s) {missing} not found in table '{table}'.")
+
+    return [schema[col][0] for col in columns]
+
+
+async def _copy_values(
+    cur: psycopg.AsyncCursor,
+    table: str,
+    columns: tuple,
+    values: Iterable[tuple],
+    binary: bool = False,
+    types: list = None,
+) -> int:
+    """Async version of wrapg._copy_values(); stream rows (tuples
+    of values in column order) into table using postgres COPY.
+    """
+
+    if binary and types is None:
+        # Binary format needs postgres type of each column, cached by catalog
+        types = await _column_types(cur.connection, table=table, columns=columns)
+
+    copy_sql = snippet.copy_snip(table=table, columns=columns, binary=binary)
+
+    async with cur.copy(copy_sql) as copy:
+        if binary:
+            copy.set_types(types)
+
+        for row in values:
+            await copy.write_row(row)
+
+    # Cursor rowcount set by postgres COPY command
+    return cur.rowcount
+
+
+async def _copy_rows(
+    cur: psycopg.AsyncCursor,
+    table: str,
+    columns: tuple,
+    rows: Iterable,
+    binary: bool = False,
+) -> int:
+    """Async version of wrapg._copy_rows(); stream rows (dictionaries
+    or tuples) into table using postgres COPY, NaN values as NULL and
+    integral floats of integer columns as int.
+    """
+    values = (
+        row if isinstance(row, tuple) else util.copy_values(row, columns)
+        for row in rows
+    )
+
+    types = await _column_types(cur.connection, table=table, columns=columns)
+    values = util.integral_values(values, types=types)
+
+    return await _copy_values(
+        cur, table=table, columns=columns, values=values, binary=binary, types=types
+    )
+
+
+async def _copy_frame(
+    cur: psycopg.AsyncCursor,
+    table: str,
+    df,
+    binary: bool = False,
+    chunk_size: int = 100_000,
+) -> int:
+    """Async version of wrapg._copy_frame(); stream pandas dataframe (csv
+    text or binary from column arrays) or arrow/polars data (from column
+    buffers) into table using postgres COPY, chunk_size rows at a time.
+    """
+
+    if util.is_arrow(df):
+        data = util.arrow_table(df)
+        columns = tuple(data.column_names)
+
+        if binary:
+            values = util.arrow_values(data, chunk_size=chunk_size)
+            return await _copy_values(cur, table, columns, values, binary=True)
+
+        # Arrow csv writes nulls as unquoted empty values
+        copy_sql = snippet.copy_csv_snip(table=table, columns=columns, null="")
+        async with cur.copy(copy_sql) as copy:
+            for block in util.arrow_csv(data, chunk_size=chunk_size):
+                await copy.write(block)
+        return cur.rowcount
+
+    columns = tuple(df.columns)
+
+    # NaN filled int columns are float (4.0); cast to Int64 for integer
+    # table columns, both formats write 4
+    types = await _column_types(cur.connection, table=table, columns=columns)
+    df = util.integral_floats(df, types=types)
+
+    if binary:
+        values = util.frame_values(df, chunk_size=chunk_size)
+        return await _copy_values(cur, table, columns, values, binary=True, types=types)
+
+    copy_sql = snippet.copy_csv_snip(table=table, columns=columns)
+    async with cur.copy(copy_sql) as copy:
+        # One csv block per chunk; NaN/NaT/NA written as \N (NULL)
+        for start in range(0, len(df), chunk_size):
+            chunk = df.iloc[start : start + chunk_size]
+            await copy.write(chunk.to_csv(header=False, index=False, na_rep="\\N"))
+
+    # Cursor rowcount set by postgres COPY command
+    return cur.rowcount
+
+
+async def _ensure_unique_index(
+    conn: psycopg.AsyncConnection, table: str, keys: Iterable
+) -> bool:
+    """Async version of catalog.ensure_unique_index(); create unique index
+    on keys under advisory lock if cached pg_index has none.
+    """
+
+    async def has_unique_index() -> bool:
+        found = catalog.cached(conn, table, keys)
+        if found is not None:
+            return found
+
+        async with conn.cursor(row_factory=tuple_row) as cur:
+            await cur.execute(query=snippet.unique_index_keys_snip(table=table))
+            rows = await cur.fetchall()
+        return catalog.key_set(keys) in catalog.store(conn, table, rows)
+
+    if await has_unique_index():
+        return False
+
+    # Lock held until commit, re-read catalog after waiting for lock
+    await conn.execute(snippet.advisory_lock_snip(name=f"wrapg_uix:{table}"))
+    catalog.invalidate(table)
+    if await has_unique_index():
+        return False
+
+    await conn.execute(
+        snippet.render_snip(conn, "create_unique_index", table=table, keys=keys)
+    )
+    catalog.created(conn, table, keys)
+    return True
+
+
+# ================================= Functions ================================
+
+
+async def query(
+    raw_sql: str,
+    params: tuple | dict = None,
+    to_df: bool = False,
+    to_arrow: bool = False,
+    itersize: int = 2_000,
+    conn_kwargs: dict = None,
+):
+    """Async version of wrapg.query(); send raw sql query to postgres db.
+
+    Args:
+        raw_sql (str): sql query in string form. named (%(name)s) or un-named (%s) placeholders are allowed.
+        params (tuple | dict) : data for named or un-named placeholders
+        to_df (bool, optional): Return results of query in dataframe. Defaults to False.
+        to_arrow (bool, optional): Return results of query as pyarrow Table, built
+        one record batch of itersize rows at a time. Defaults to False.
+        itersize (int, optional): # of rows per record batch. Defaults to 2_000.
+        conn_kwargs (dict, optional): Specify/overide conn kwargs. See full list of options,
+        https://www.postgresql.org/docs/current/libpq-connect.html#LIBPQ-PARAMKEYWORDS.
+        Defaults to None, recommend importing via .env file.
+
+    Returns:
+        _type_: Iterator[dict], Dataframe or pyarrow Table
+    """
+
+    if to_df and to_arrow:
+        raise ValueError("Use either to_df or to_arrow, not both.")
+
+    # Set default return type (row factory) to dictionary, can be overwritten with kwargs
+    conn_final = {"row_factory": psycopg.rows.dict_row, **_conn_final(conn_kwargs)}
+    row_factory = conn_final.pop("row_factory")
+
+    # Dataframes/arrow are built column wise from tuples
+    if to_df is True or to_arrow is True:
+        row_factory = psycopg.rows.tuple_row
+
+    async with connection(conn_final) as conn:
+        async with conn.cursor(row_factory=row_factory) as cur:
+            await cur.execute(query=raw_sql, params=params)
+
+            # If 'select' in status message return records as df or iter
+            if "SELECT" in cur.statusmessage:
+                if to_arrow is True:
+                    batches = []
+                    while rows := await cur.fetchmany(itersize):
+                        batches.append(util.rows_to_arrow(rows, cur.description))
+
+                    # Empty result still gets its columns
+                    if not batches:
+                        batches.append(util.rows_to_arrow([], cur.description))
+                    return util.batches_to_table(batches)
+
+                rows = await cur.fetchall()
+
+                if to_df is True:
+                    return util.rows_to_df(rows, cur.description)
+
+                return iter(rows)
+
+
+async def insert(
+    data,
+    table: str,
+    method: str = "executemany",
+    binary: bool = False,
+    batch_size: int = None,
+    conn_kwargs: dict = None,
+) -> int:
+    """Async version of wrapg.insert(); add rows into specified table.
+
+    Args:
+        data (Iterable[dict] | pd.DataFrame): dict, list of dict, dataframe, or any
+        iterable/generator/async iterable of dict; iterators are consumed in chunks
+        of batch_size rows, each chunk runs (and commits) on its own.
+        table (str): name of database table
+        method (str, optional): "executemany", "copy" or "auto" (copy when
+        rows >= wrapg.wrapg.copy_threshold). Defaults to "executemany".
+        binary (bool, optional): use binary COPY format. Defaults to False.
+        batch_size (int, optional): # of rows per chunk when data is an iterator.
+        Defaults to None, uses wrapg.wrapg.stream_batch_size (10_000).
+        conn_kwargs (dict, optional): Specify/overide conn kwargs. See full list of options,
+        https://www.postgresql.org/docs/current/libpq-connect.html#LIBPQ-PARAMKEYWORDS.
+        Defaults to None, recommend importing via .env file.
+
+    Returns:
+        int: # of inserted records
+    """
+
+    if method not in ("auto", "executemany", "copy"):
+        raise ValueError(
+            f"Unsupported method '{method}', use auto, executemany or copy."
+        )
+
+    conn_final = _conn_final(conn_kwargs)
+
+    rw_count = 0
+    async for chunk in _chunks(data, batch_size):
+        # Dataframes (pandas, arrow, polars) are copied straight from
+        # column arrays, same as wrapg.insert()
+        if util.is_frame(chunk) and (
+            method == "copy"
+            or (method == "auto" and len(chunk) >= wrapg.copy_threshold)
+        ):
+            async with connection(conn_final) as conn:
+                async with conn.cursor() as cur:
+                    rw_count += await _copy_frame(cur, table, chunk, binary=binary)
+            continue
+
+        # Dataframe rows as tuples for un-named placeholders, no dict per row
+        positional = util.is_frame(chunk)
+        groups = util.transform_groups(chunk, positional=positional)
+
+        copy = method == "copy" or (
+            method == "auto"
+            and sum(len(grp_rows) for _, grp_rows in groups) >= wrapg.copy_threshold
+        )
+
+        async with connection(conn_final) as conn:
+            async with conn.cursor() as cur:
+                for grp_columns, grp_rows in groups:
+
+                    if copy:
+                        # NaN/NaT/NA values copied as NULL
+                        rw_count += await _copy_rows(
+                            cur, table, grp_columns, grp_rows, binary=binary
+                        )
+                        continue
+
+                    qry = snippet.render_snip(
+                        conn,
+                        "insert",
+                        table=table,
+                        columns=grp_columns,
+                        positional=positional,
+                    )
+                    await cur.executemany(query=qry, params_seq=grp_rows)
+                    rw_count += cur.rowcount
+
+    return rw_count
+
+
+async def upsert(
+    data,
+    table: str,
+    keys: Iterable,
+    exclude_update: Iterable = None,
+    use_index: bool = True,
+    method: str = "executemany",
+    engine: str = "auto",
+    batch_size: int = None,
+    conn_kwargs: dict = None,
+) -> int:
+    """Async version of wrapg.upsert(); INSERT ON CONFLICT DO UPDATE SET.
+    Unique index on keys is created automatically if none exist.
+    Errors are raised (sync version prints & quits).
+    Only the on_conflict engine with executemany is supported; staging
+    table paths (use_index=False, method="copy", cte/merge engines) of
+    the sync version raise ValueError.
+
+    Args:
+        data (Iterable[dict] | pd.DataFrame): dict, list of dict, dataframe, or any
+        iterable/generator/async iterable of dict, see insert()
+        table (str): name of database table
+        keys (Iterable): column names used to match records
+        exclude_update (Iterable): exclude columns from updating database
+        use_index (bool, optional): must be True. Defaults to True.
+        method (str, optional): must be "executemany" (or "auto", same).
+        Defaults to "executemany".
+        engine (str, optional): must be "on_conflict" (or "auto", same).
+        Defaults to "auto".
+        batch_size (int, optional): # of rows per chunk when data is an iterator.
+        Defaults to None, uses wrapg.wrapg.stream_batch_size (10_000).
+        conn_kwargs (dict, optional): Specify/overide conn kwargs. See full list of options,
+        https://www.postgresql.org/docs/current/libpq-connect.html#LIBPQ-PARAMKEYWORDS.
+        Defaults to None, recommend importing via .env file.
+
+    Raises:
+        ValueError: use_index, method or engine not supported by async version
+
+    Returns:
+        int: # of updated or inserted records
+    """
+
+    # Staging table paths of wrapg.upsert() not implemented for asyncio
+    if use_index is not True:
+        raise ValueError("aio.upsert() requires use_index=True, see wrapg.upsert().")
+    if method not in ("auto", "executemany"):
+        raise ValueError(
+            f"Unsupported method '{method}' for aio.upsert(), use executemany."
+        )
+    if engine not in ("auto", "on_conflict"):
+        raise ValueError(
+            f"Unsupported engine '{engine}' for aio.upsert(), use on_conflict."
+        )
+
+    conn_final = _conn_final(conn_kwargs)
+
+    rw_count = 0
+    async for chunk in _chunks(data, batch_size):
+        positional = util.is_frame(chunk)
+        groups = util.transform_groups(chunk, positional=positional, ordered=True)
+
+        async with connection(conn_final) as conn:
+            async with conn.cursor() as cur:
+
+                async def upsert_rows() -> int:
+                    count = 0
+                    for grp_columns, grp_rows in groups:
+                        qry = snippet.render_snip(
+                            conn,
+                            "upsert",
+                            table=table,
+                            columns=grp_columns,
+                            keys=keys,
+                            exclude_update=exclude_update,
+                            positional=positional,
+                        )
+                        await cur.executemany(query=qry, params_seq=grp_rows)
+                        count += cur.rowcount
+                    return count
+
+                async def upsert_indexed() -> int:
+                    index_created = await _ensure_unique_index(
+                        conn, table=table, keys=keys
+                    )
+                    try:
+                        return await upsert_rows()
+                    except BaseException:
+                        # Index rolled back with savepoint, drop it from cache
+                        if index_created:
+                            catalog.invalidate(table)
+                        raise
+
+                try:
+                    # Savepoint; on error only this attempt is rolled back
+                    async with conn.transaction():
+                        rw_count += await upsert_indexed()
+
+                except errors.InvalidColumnReference:
+                    # Cached index dropped outside wrapg, re-read catalog & try again
+                    catalog.invalidate(table)
+                    async with conn.transaction():
+                        rw_count += await upsert_indexed()
+
+    return rw_count
+
+
+async def update(
+    data,
+    table: str,
+    keys: Iterable,
+    exclude_update: Iterable = None,
+    batch_size: int = None,
+    conn_kwargs: dict = None,
+) -> int:
+    """Async version of wrapg.update(); update rows matching keys.
+
+    Args:
+        data (Iterable[dict] | pd.DataFrame): dict, list of dict, dataframe, or any
+        iterable/generator/async iterable of dict, see insert()
+        table (str): name of database table
+        keys (Iterable): column names used to filter & match records; synonymous with sql WHERE
+        exclude_update (Iterable): exclude columns from updating database
+        batch_size (int, optional): # of rows per chunk when data is an iterator.
+        Defaults to None, uses wrapg.wrapg.stream_batch_size (10_000).
+        conn_kwargs (dict, optional): Specify/overide conn kwargs. See full list of options,
+        https://www.postgresql.org/docs/current/libpq-connect.html#LIBPQ-PARAMKEYWORDS.
+        Defaults to None, recommend importing via .env file.
+
+    Returns:
+        int: # of updated records
+    """
+
+    conn_final = _conn_final(conn_kwargs)
+
+    rw_count = 0
+    async for chunk in _chunks(data, batch_size):
+        # UPDATE needs named placeholders, rows as dict
+        groups = util.transform_groups(chunk, ordered=True)
+
+        async with connection(conn_final) as conn:
+            async with conn.cursor() as cur:
+                for grp_columns, grp_rows in groups:
+                    qry = snippet.render_snip(
+                        conn,
+                        "update",
+                        table=table,
+                        columns=grp_columns,
+                        keys=keys,
+                        exclude_update=exclude_update,
+                    )
+                    await cur.executemany(query=qry, params_seq=grp_rows)
+                    rw_count += cur.rowcount
+
+    return rw_count
+
+
+async def delete(table: str, where: dict, conn_kwargs: dict = None) -> None:
+    """Async version of wrapg.delete(); delete rows matching
+    'where' condition, column=value dictionary.
+
+    Args:
+        table (str): name of database table
+        where (dict): column=value dictionary which specifies rows to be removed.
+        conn_kwargs (dict, optional): Specify/overide conn kwargs. See full list of options,
+        https://www.postgresql.org/docs/current/libpq-connect.html#LIBPQ-PARAMKEYWORDS.
+        Defaults to None, recommend importing via .env file.
+    """
+
+    async with connection(_conn_final(conn_kwargs)) as conn:
+        async with conn.cursor() as cur:
+            qry = snippet.render_snip(conn, "delete", table=table, where=where)
+
+            # where values passed as params in order of where keys
+            await cur.execute(query=qry, params=tuple(where.values()))
+
+
+async def create_table(table: str, columns: dict, conn_kwargs: dict = None) -> None:
+    """Async version of wrapg.create_table().
+
+    Args:
+        table (str): name of new table
+        columns (dict): dictionary of column name, datatype, contraints.
+        conn_kwargs (dict, optional): Specify/overide conn kwargs. See full list of options,
+        https://www.postgresql.org/docs/current/libpq-connect.html#LIBPQ-PARAMKEYWORDS.
+        Defaults to None, recommend importing via .env file.
+
+    Example:
+        cols = dict(id="serial", name="varchar(75) unique not null", age="int")
+        await create_table(table="mytable", columns=cols)
+    """
+
+    async with connection(_conn_final(conn_kwargs)) as conn:
+        async with conn.cursor() as cur:
+            qry = snippet.create_table_snip(table=table, columns=columns)
+            await cur.execute(query=qry)
+
+            # Table may have been dropped & created again, drop cached metadata
+            catalog.invalidate(table)
+
+
+async def _copy_csv_piece(
+    table: str,
+    file: str,
+    start: int,
+    end: int,
+    header: bool,
+    block_size: int,
+    conn_final: dict,
+) -> dict:
+    """Async version of wrapg._copy_csv_piece(); file is read
+    in a thread so event loop is not blocked.
+    """
+
+    started = time.perf_counter()
+
+    async with connection(conn_final) as conn:
+        async with conn.cursor() as cur:
+            copy_sql = snippet.copy_from_csv_snip(table=table, header=header)
+
+            with open(file, "rb") as f:
+                await asyncio.to_thread(f.seek, start)
+                remaining = end - start
+
+                async with cur.copy(copy_sql) as copy:
+                    while remaining > 0 and (
+                        data := await asyncio.to_thread(
+                            f.read, min(block_size, remaining)
+                        )
+                    ):
+                        await copy.write(data)
+                        remaining -= len(data)
+
+            rows = cur.rowcount
+
+    seconds = time.perf_counter() - started
+
+    return {
+        "worker": asyncio.current_task().get_name(),
+        "file": str(file),
+        "start": start,
+        "end": end,
+        "rows": rows,
+        "bytes": end - start,
+        "seconds": seconds,
+        "mb_per_sec": (end - start) / 1_000_000 / seconds if seconds else 0.0,
+    }
+
+
+async def copy_from_csv(
+    table: str,
+    csv_file: str | list,
+    header: bool = False,
+    block_size=50_000,
+    workers: int = 1,
+    split: bool = False,
+    conn_kwargs: dict = None,
+) -> list[dict]:
+    """Async version of wrapg.copy_from_csv(); copy .csv data to table
+    using postgres copy protocol. Pieces run as concurrent tasks,
+    at most 'workers' at a time, each on its own connection.
+
+    Args:
+        table (str): table name to run copy command on
+        csv_file (str | list): csv file path, glob pattern (ie 'data/*.csv') or list of paths
+        header (bool): True indicates file has header and will ignore it.
+        block_size (int, optional): # of bytes sent per write. Defaults to 50_000.
+        workers (int, optional): # of pieces copied at same time, capped to
+        pool max_size. Defaults to 1.
+        split (bool, optional): Split each file at line boundaries into 'workers' byte ranges.
+        Only for csv without line breaks inside quoted values. Defaults to False.
+        conn_kwargs (dict, optional): Specify/overide conn kwargs. See full list of options,
+        https://www.postgresql.org/docs/current/libpq-connect.html#LIBPQ-PARAMKEYWORDS.
+        Defaults to None, recommend importing via .env file.
+
+    Returns:
+        list[dict]: stats per piece copied; worker, file, start, end, rows, bytes, seconds, mb_per_sec
+    """
+
+    conn_final = _conn_final(conn_kwargs)
+
+    # Expand glob pattern or list of files
+    if isinstance(csv_file, (list, tuple)):
+        files = list(csv_file)
+    elif glob.has_magic(str(csv_file)):
+        files = sorted(glob.glob(str(csv_file)))
+    else:
+        files = [csv_file]
+
+    if not files:
+        raise ValueError(f"No csv files found matching '{csv_file}'.")
+
+    # Workers beyond pool size would wait on a connection
+    if pool.use_pool:
+        workers = min(workers, pool.pool_config["max_size"])
+    workers = max(workers, 1)
+
+    # Stat & seek of every file is blocking i/o, keep it off the event loop
+    pieces = await asyncio.to_thread(
+        wrapg._csv_pieces, files, header=header, split=workers if split else 1
+    )
+    semaphore = asyncio.Semaphore(workers)
+
+    async def copy_piece(piece):
+        file, start, end, has_header = piece
+        async with semaphore:
+            return await _copy_csv_piece(
+                table, file, start, end, has_header, block_size, conn_final
+            )
+
+    # Results in order of pieces, first error is raised
+    return list(await asyncio.gather(*map(copy_piece, pieces)))
@@ -0,0 +1,262 @@
+import re
+import time
+import threading
+from contextlib import contextmanager
+from typing import Iterable
+from psycopg.rows import tuple_row
+from wrapg import snippet
+
+
+# ===========================================================================
+#  ?                                catalog
+#  @description    :  Cache of table metadata read from postgres catalog.
+# Unique index key sets (pg_index); upsert() & insert_ignore() check the
+# cache before ON CONFLICT (keys), missing indexes are created up front
+# under an advisory lock instead of failing the batch and replaying it.
+# Column types (pg_attribute); binary COPY picks typed dumpers per column
+# without a round trip to read types on every call.
+# ===========================================================================
+
+# Seconds a cached table schema is used before read again from catalog
+schema_ttl: float = 300.0
+
+# Unique key sets keyed by (host, port, dbname, table)
+__unique_keys: dict = {}
+# (read at, {column: (type oid, type name)}) keyed by (host, port, dbname, table)
+__schemas: dict = {}
+__lock = threading.Lock()
+
+
+def key_set(keys: Iterable) -> frozenset:
+    """Return keys normalized for comparison with pg_index key expressions;
+    quotes removed, sql function lower case, ie 'Date(ts)' -> 'date(ts)'.
+    Order is ignored, same as ON CONFLICT index inference.
+
+    Args:
+        keys (Iterable): column names, may include sql func ie Date(ts)
+
+    Returns:
+        frozenset: normalized keys
+    """
+
+    def normalize(key: str) -> str:
+        key = re.sub(r'["\s]', "", key)
+        # sql function names are case insensitive, column names are not
+        func = re.fullmatch(r"(\w+)\((\w+)\)", key)
+        if func is None:
+            return key
+        return f"{func.group(1).lower()}({func.group(2)})"
+
+    return frozenset(map(normalize, keys))
+
+
+def cache_key(conn, table: str) -> tuple:
+    """Return cache key of table on database of connection (sync or async)."""
+    info = conn.info
+    return (info.host, info.port, info.dbname, table)
+
+
+def cached(conn, table: str, keys: Iterable) -> bool | None:
+    """Return True if cached unique index matches keys, False if table is
+    cached without one, None if table not cached yet.
+    """
+    with __lock:
+        unique_keys = __unique_keys.get(cache_key(conn, table))
+
+    if unique_keys is None:
+        return None
+    return key_set(keys) in unique_keys
+
+
+def store(conn, table: str, rows: Iterable) -> set:
+    """Cache unique key sets of table from rows of snippet.unique_index_keys_snip().
+
+    Returns:
+        set: frozenset of normalized keys per unique index
+    """
+    unique_keys = {key_set(row[0]) for row in rows}
+    with __lock:
+        __unique_keys[cache_key(conn, table)] = unique_keys
+    return unique_keys
+
+
+def invalidate(table: str = None) -> None:
+    """Drop cached unique indexes & schema of table (all databases), or whole
+    cache if table is None. Call after altering tables/indexes outside wrapg.
+    """
+    with __lock:
+        for cache in (__unique_keys, __schemas):
+            if table is None:
+                cache.clear()
+                continue
+            for key in [k for k in cache if k[-1] == table]:
+                del cache[key]
+
+
+def cache_info() -> dict:
+    """Return # of cached tables, their unique key sets & # of cached schemas."""
+    with __lock:
+        return {
+            "size": len(__unique_keys),
+            "tables": {k: sorted(map(sorted, v)) for k, v in __unique_keys.items()},
+            "schemas": len(__schemas),
+        }
+
+
+def has_unique_index(conn, table: str, keys: Iterable) -> bool:
+    """Return True if table has unique index on keys; reads pg_index once
+    per table, later calls served from cache.
+
+    Args:
+        conn (Connection): open connection
+        table (str): database table name
+        keys (Iterable): column names, may include sql func ie Date(ts)
+    """
+    found = cached(conn, table, keys)
+    if found is not None:
+        return found
+
+    with conn.cursor(row_factory=tuple_row) as cur:
+        cur.execute(query=snippet.unique_index_keys_snip(table=table))
+        return key_set(keys) in store(conn, table, cur.fetchall())
+
+
+def ensure_unique_index(conn, table: str, keys: Iterable) -> bool:
+    """Create unique index on keys if table has none. Index is created under
+    a transaction advisory lock with IF NOT EXISTS; concurrent writers wait
+    for the first one, re-read pg_index and skip creation.
+
+    Args:
+        conn (Connection): open connection
+        table (str): database table name
+        keys (Iterable): column names, may include sql func ie Date(ts)
+
+    Returns:
+        bool: True if index was created by this call
+    """
+    if has_unique_index(conn, table, keys):
+        return False
+
+    # Lock held until commit, other writers see committed index
+    conn.execute(query=snippet.advisory_lock_snip(name=f"wrapg_uix:{table}"))
+
+    # Re-read catalog, index may have been created while waiting for lock
+    invalidate(table)
+    if has_unique_index(conn, table, keys):
+        return False
+
+    print(f"> Creating unique index for {keys}...")
+    conn.execute(
+        query=snippet.render_snip(conn, "create_unique_index", table=table, keys=keys)
+    )
+    created(conn, table, keys)
+    return True
+
+
+@contextmanager
+def unique_index(conn, table: str, keys: Iterable):
+    """Context manager ensuring unique index on keys (see ensure_unique_index())
+    for a block run in a transaction/savepoint. Index created here is cached
+    before commit; if the block fails the index is rolled back, so it is
+    dropped from cache too.
+
+    Args:
+        conn (Connection): open connection, inside transaction block
+        table (str): database table name
+        keys (Iterable): column names, may include sql func ie Date(ts)
+
+    Yields:
+        bool: True if index was created
+    """
+    index_created = ensure_unique_index(conn, table, keys)
+    try:
+        yield index_created
+    except BaseException:
+        if index_created:
+            invalidate(table)
+        raise
+
+
+def created(conn, table: str, keys: Iterable) -> None:
+    """Add unique index on keys to cached indexes of table."""
+    with __lock:
+        __unique_keys.setdefault(cache_key(conn, table), set()).add(key_set(keys))
+
+
+# =================== Table Schema ===================
+
+
+def cached_schema(conn, table: str) -> dict | None:
+    """Return cached {column: (type oid, type name)} of table,
+    None if not cached or older than schema_ttl.
+    """
+    with __lock:
+        entry = __schemas.get(cache_key(conn, table))
+
+    if entry is None or time.monotonic() - entry[0] > schema_ttl:
+        return None
+    return entry[1]
+
+
+def store_schema(conn, table: str, rows: Iterable) -> dict:
+    """Cache schema of table from rows of snippet.table_schema_snip().
+
+    Returns:
+        dict: {column: (type oid, type name)}
+    """
+    schema = {name: (oid, type_name) for name, oid, type_name in rows}
+    with __lock:
+        __schemas[cache_key(conn, table)] = (time.monotonic(), schema)
+    return schema
+
+
+def table_schema(conn, table: str, refresh: bool = False) -> dict:
+    """Return {column: (type oid, type name)} of table in column order;
+    read from pg_attribute once per schema_ttl seconds.
+
+    Args:
+        conn (Connection): open connection
+        table (str): database table name
+        refresh (bool, optional): ignore cache, read catalog. Defaults to False.
+    """
+    schema = None if refresh else cached_schema(conn, table)
+    if schema is not None:
+        return schema
+
+    with conn.cursor(row_factory=tuple_row) as cur:
+        cur.execute(query=snippet.table_schema_snip(table=table))
+        return store_schema(conn, table, cur.fetchall())
+
+
+def missing_columns(schema: dict, columns: Iterable) -> list:
+    """Return columns not found in schema."""
+    return [col for col in columns if col not in schema]
+
+
+def column_types(conn, table: str, columns: Iterable) -> list:
+    """Return type oid of each column of table, ie for copy.set_types().
+    Cached schema is read again once if a column is not found (ie added
+    since cached).
+
+    Args:
+        conn (Connection): open connection
+        table (str): database table name
+        columns (Iterable): column names
+
+    Raises:
+        ValueError: table has no column in columns
+
+    Returns:
+        list: type oids, in order of columns
+    """
+    schema = table_schema(conn, table)
+
+    if missing_columns(schema, columns):
+        schema = table_schema(conn, table, refresh=True)
+
+    missing = missing_columns(schema, columns)
+    if missing:
+        raise ValueError(f"Column(s) {missing} not found in table '{table}'.")
+
+    return [schema[col][0] for col in columns]
+
@@ -0,0 +1,208 @@
+import atexit
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+import psycopg
+from psycopg_pool import ConnectionPool
+
+
+# ===========================================================================
+#  ?                                pool
+#  @description    :  Process wide connection pools used by every wrapg
+# function. One pool is created per unique set of connection parameters
+# (conn_import merged with conn_kwargs) and reused on later calls.
+# ===========================================================================
+
+# Set to False to open a new connection for every function call (old behavior)
+use_pool: bool = True
+
+# Options passed to each new ConnectionPool; see psycopg_pool docs
+# https://www.psycopg.org/psycopg3/docs/api/pool.html
+pool_config: dict = {
+    "min_size": 1,
+    "max_size": 10,
+    # seconds an idle connection above min_size is kept before closing
+    "max_idle": 600.0,
+    # seconds to wait for a free connection before raising PoolTimeout
+    "timeout": 30.0,
+}
+
+# Health check (one extra round trip) each connection before handing it out.
+# Off by default; broken connections are discarded when returned to pool
+# and idle connections are closed after max_idle. Turn on if the server
+# or network drops idle connections often (ie failover, firewalls).
+check_on_borrow: bool = False
+
+# Server side prepared statements, set on every new connection.
+# Statement executed prepare_threshold times on a connection is prepared
+# (0 = prepare on first execute, None = never); executemany() always prepares.
+# prepared_max = max prepared statements kept per connection (LRU).
+# Plans survive across function calls since pooled connections are reused.
+# One config for every pool (sync & aio), read when a connection is created;
+# connections already pooled keep old values until close_pools() (aio too).
+prepare_config: dict = {
+    "prepare_threshold": 5,
+    "prepared_max": 100,
+}
+
+# Pools keyed by connection parameters, guarded by lock for thread safety
+__pools: dict = {}
+__lock = threading.Lock()
+
+# Session active in current thread/task, set by wrapg.Session
+active_session: ContextVar = ContextVar("wrapg_session", default=None)
+
+
+def pool_key(conn_params: dict) -> tuple:
+    """Return hashable key representing connection parameters.
+    Parameters set to None are ignored by psycopg and are skipped
+    so they do not create duplicate pools.
+
+    Args:
+        conn_params (dict): merged conn_import & conn_kwargs
+
+    Returns:
+        tuple: sorted ((param, value), ...)
+    """
+    return tuple(sorted((k, str(v)) for k, v in conn_params.items() if v is not None))
+
+
+def get_pool(conn_params: dict) -> ConnectionPool:
+    """Return pool for connection parameters, create pool if
+    none exist yet.
+
+    Args:
+        conn_params (dict): merged conn_import & conn_kwargs
+
+    Returns:
+        ConnectionPool: pool for connection parameters
+    """
+    key = pool_key(conn_params)
+
+    # Fast path, pool already created
+    pool = __pools.get(key)
+    if pool is not None:
+        return pool
+
+    kwargs = {k: v for k, v in conn_params.items() if v is not None}
+
+    # Pool connects in background & retries until timeout, errors only
+    # logged; connect once up front so bad host/password/dbname raise
+    # OperationalError right away & no pool is kept for them
+    psycopg.connect(**kwargs).close()
+
+    with __lock:
+        # Check again, another thread may have created pool while waiting
+        pool = __pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(
+                kwargs=kwargs,
+                # Optional health check before handing connection out
+                check=ConnectionPool.check_connection if check_on_borrow else None,
+                configure=configure,
+                name=f"wrapg-{len(__pools)}",
+                open=True,
+                **pool_config,
+            )
+            __pools[key] = pool
+
+    return pool
+
+
+def configure(conn: psycopg.Connection) -> None:
+    """Apply prepare_config to new connection."""
+    conn.prepare_threshold = prepare_config["prepare_threshold"]
+    conn.prepared_max = prepare_config["prepared_max"]
+
+
+@contextmanager
+def connection(conn_params: dict):
+    """Context manager yielding a connection for connection parameters.
+    Same behavior as 'with psycopg.connect() as conn', transaction is
+    committed on exit or rolled back on error. Inside a Session the
+    session connection is yielded and left uncommitted.
+
+    Args:
+        conn_params (dict): merged conn_import & conn_kwargs
+
+    Yields:
+        Connection: session, pooled or new connection (if use_pool is False)
+    """
+    # Reuse session connection if a Session with same parameters is active;
+    # session commits once on exit, do not commit here
+    session = active_session.get()
+    if session is not None and session.key == pool_key(conn_params):
+        if session.savepoints:
+            # Each call in own savepoint, error only rolls back this call
+            with session.conn.transaction():
+                yield session.conn
+        else:
+            yield session.conn
+        return
+
+    if use_pool is False:
+        with psycopg.connect(**conn_params) as conn:
+            configure(conn)
+            yield conn
+        return
+
+    with get_pool(conn_params).connection() as conn:
+        yield conn
+
+
+@contextmanager
+def checkout(conn_params: dict):
+    """Context manager yielding a pooled (or new, if use_pool is False)
+    connection without transaction handling; caller commits. Connection
+    is returned to pool (or closed) on exit, open transaction is rolled back.
+
+    Args:
+        conn_params (dict): merged conn_import & conn_kwargs
+
+    Yields:
+        Connection: pooled or new connection
+    """
+    if use_pool is False:
+        conn = psycopg.connect(**conn_params)
+        configure(conn)
+        try:
+            yield conn
+        finally:
+            conn.close()
+        return
+
+    conn_pool = get_pool(conn_params)
+    conn = conn_pool.getconn()
+    try:
+        yield conn
+    finally:
+        conn_pool.putconn(conn)
+
+
+def pool_stats() -> dict:
+    """Return statistics for each pool created by wrapg.
+    See psycopg_pool docs for description of each metric.
+
+    Returns:
+        dict: {pool name: {metric: value}}
+    """
+    with __lock:
+        pools = list(__pools.values())
+
+    return {pool.name: pool.get_stats() for pool in pools}
+
+
+def close_pools() -> None:
+    """Close all pools and their connections; new pools
+    are created on next function call.
+    """
+    with __lock:
+        pools = list(__pools.values())
+        __pools.clear()
+
+    for pool in pools:
+        pool.close()
+
+
+# Close connections cleanly when interpreter exits
+atexit.register(close_pools)
@@ -0,0 +1,246 @@
+import weakref
+from contextlib import contextmanager
+import psycopg
+from wrapg import wrapg, pool, catalog
+
+
+# ===========================================================================
+#  ?                                session
+#  @description    :  Run multiple wrapg functions on one connection and
+# one transaction. Transaction is committed once when session exits.
+# ===========================================================================
+
+
+class Session:
+    """Run wrapg functions on one connection within one transaction.
+    Changes are committed once on exit, rolled back if an error occurs.
+
+    Any wrapg function called inside the 'with' block using the same
+    connection parameters joins the session; functions called with
+    different conn_kwargs (ie another db) run on their own connection.
+
+    Args:
+        conn_kwargs (dict, optional): Specify/overide conn kwargs. See full list of options,
+        https://www.postgresql.org/docs/current/libpq-connect.html#LIBPQ-PARAMKEYWORDS.
+        Defaults to None, recommend importing via .env file.
+        savepoints (bool, optional): Run each function call in own savepoint; a
+        failed call only rolls back its own changes. Defaults to False.
+
+    Example:
+        with wrapg.connect() as session:
+            session.insert(data=heroes, table="heroes")
+            session.upsert(data=villians, table="villians", keys=["name"])
+    """
+
+    def __init__(self, conn_kwargs: dict = None, savepoints: bool = False):
+
+        # Initialize conn_kwargs to empty dict if no arguments passed
+        if conn_kwargs is None:
+            conn_kwargs = {}
+
+        # Row factory is set per cursor by each function, not per connection
+        self.conn_kwargs = {k: v for k, v in conn_kwargs.items() if k != "row_factory"}
+        self.savepoints = savepoints
+
+        # Final conn parameters, must match parameters merged by each function
+        conn_final = {**wrapg.conn_import, **self.conn_kwargs}
+        self.key = pool.pool_key(conn_final)
+        self.__conn_final = conn_final
+
+        self.conn = None
+        self.__pool = None
+        self.__transaction = None
+        self.__tokens = []
+        # Open query(stream=True) generators, closed before session ends
+        self.__streams = weakref.WeakSet()
+
+    def __enter__(self):
+        if pool.use_pool:
+            self.__pool = pool.get_pool(self.__conn_final)
+            self.conn = self.__pool.getconn()
+        else:
+            self.conn = psycopg.connect(**self.__conn_final)
+            pool.configure(self.conn)
+
+        # Outer transaction; nested transaction() blocks become savepoints
+        self.__transaction = self.conn.transaction()
+        self.__transaction.__enter__()
+
+        self.__tokens.append(pool.active_session.set(self))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pool.active_session.reset(self.__tokens.pop())
+
+        # Close server side cursors while connection is still the session's
+        for rows in list(self.__streams):
+            rows.close()
+
+        rolled_back = exc_type is not None
+        try:
+            # Commit, or rollback if exception raised inside 'with' block
+            self.__transaction.__exit__(exc_type, exc_value, traceback)
+        except BaseException:
+            rolled_back = True
+            raise
+        finally:
+            # Unique indexes created in session were cached before commit
+            if rolled_back:
+                catalog.invalidate()
+            if self.__pool is not None:
+                self.__pool.putconn(self.conn)
+            else:
+                self.conn.close()
+            self.conn = None
+
+        # Do not suppress exceptions
+        return False
+
+    @contextmanager
+    def __activate(self):
+        """Make session active for calls from threads/tasks
+        other than the one that entered the session.
+        """
+        if self.conn is None:
+            raise RuntimeError(
+                "Session not started or closed, use 'with wrapg.connect() as session'"
+            )
+
+        token = pool.active_session.set(self)
+        try:
+            yield
+        finally:
+            pool.active_session.reset(token)
+
+    def savepoint(self):
+        """Context manager creating a savepoint; changes inside the
+        block are rolled back if an error occurs, session continues.
+
+        Example:
+            with session.savepoint():
+                session.delete(table="heroes", where=dict(name="Bruce"))
+        """
+        return self.conn.transaction()
+
+    def prepared_statements(self) -> int:
+        """Return # of server side prepared statements on session connection."""
+        with self.__activate():
+            return wrapg.prepared_statements(conn_kwargs=self.conn_kwargs)
+
+    # =================== wrapg functions ===================
+
+    def query(self, raw_sql: str, params: tuple | dict = None, **kwargs):
+        with self.__activate():
+            result = wrapg.query(
+                raw_sql=raw_sql, params=params, conn_kwargs=self.conn_kwargs, **kwargs
+            )
+
+        # Generator runs on first next(), likely after this call returns
+        if kwargs.get("stream") is True:
+            return self.__stream(result)
+        return result
+
+    def __stream(self, rows):
+        """Yield rows of query(stream=True) from session connection.
+        Server side cursor only lives in session transaction; raises
+        RuntimeError if iterated after session exit.
+        """
+        end = object()
+        self.__streams.add(rows)
+
+        # Cursor opened on session connection, even from another thread
+        with self.__activate():
+            row = next(rows, end)
+
+        while row is not end:
+            yield row
+
+            # Closed by __exit__, connection may already be reused
+            if self.conn is None:
+                raise RuntimeError(
+                    "Session closed, consume query(stream=True) inside session."
+                )
+            row = next(rows, end)
+
+    def insert(self, data, table: str, **kwargs) -> int:
+        with self.__activate():
+            return wrapg.insert(
+                data=data, table=table, conn_kwargs=self.conn_kwargs, **kwargs
+            )
+
+    def insert_ignore(self, data, table: str, keys, **kwargs):
+        with self.__activate():
+            return wrapg.insert_ignore(
+                data=data,
+                table=table,
+                keys=keys,
+                conn_kwargs=self.conn_kwargs,
+                **kwargs
+            )
+
+    def upsert(self, data, table: str, keys, **kwargs) -> int:
+        with self.__activate():
+            return wrapg.upsert(
+                data=data,
+                table=table,
+                keys=keys,
+                conn_kwargs=self.conn_kwargs,
+                **kwargs
+            )
+
+    def update(self, data, table: str, keys, **kwargs) -> int:
+        with self.__activate():
+            return wrapg.update(
+                data=data,
+                table=table,
+                keys=keys,
+                conn_kwargs=self.conn_kwargs,
+                **kwargs
+            )
+
+    def delete(self, table: str, where: dict, **kwargs) -> None:
+        with self.__activate():
+            return wrapg.delete(
+                table=table, where=where, conn_kwargs=self.conn_kwargs, **kwargs
+            )
+
+    def clear_table(self, table: str, **kwargs) -> None:
+        with self.__activate():
+            return wrapg.clear_table(
+                table=table, conn_kwargs=self.conn_kwargs, **kwargs
+            )
+
+    def create_table(self, table: str, columns: dict, **kwargs):
+        with self.__activate():
+            return wrapg.create_table(
+                table=table, columns=columns, conn_kwargs=self.conn_kwargs, **kwargs
+            )
+
+    def copy_from_csv(self, table: str, csv_file: str, **kwargs):
+        with self.__activate():
+            return wrapg.copy_from_csv(
+                table=table, csv_file=csv_file, conn_kwargs=self.conn_kwargs, **kwargs
+            )
+
+    def copy_from_dataframe(self, df, table: str, **kwargs) -> int:
+        with self.__activate():
+            return wrapg.copy_from_dataframe(
+                df=df, table=table, conn_kwargs=self.conn_kwargs, **kwargs
+            )
+
+    def copy_to_csv(self, source: str, file, **kwargs) -> int:
+        with self.__activate():
+            return wrapg.copy_to_csv(
+                source=source, file=file, conn_kwargs=self.conn_kwargs, **kwargs
+            )
+
+
+def connect(conn_kwargs: dict = None, savepoints: bool = False) -> Session:
+    """Return Session to run multiple functions on one
+    connection and one transaction. See Session.
+
+    Example:
+        with wrapg.connect() as session:
+            session.insert(data=info, table="superhero")
+    """
+    return Session(conn_kwargs=conn_kwargs, savepoints=savepoints)
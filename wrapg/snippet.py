@@ -1,4 +1,7 @@
 import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Iterable
 from psycopg import sql, connect
 from wrapg import util
@@ -8,6 +11,12 @@ from wrapg import util
 # Regex to seperate sql_func from column name
 __compiled_pattern = re.compile(pattern=r"(\w*)\((\w*)\)")
 
+# Regex to tell a query apart from a table name, ie copy_to_csv(source);
+# keyword must be followed by whitespace, '(' or '*', table "values" is a table
+__query_pattern = re.compile(
+    pattern=r"^\s*\(?\s*(SELECT|WITH|VALUES|TABLE)[\s(*]", flags=re.IGNORECASE
+)
+
 
 # =================== Snippet Util Functions ===================
 
@@ -66,11 +75,50 @@ def colname_snip(sqlfunc_colname: tuple):
     # )
 
 
+# =================== Create Table Snippet ===================
+
+
+def create_table_snip(table: str, columns: dict):
+    """Sql snippet to create table if it does not exist.
+
+    Args:
+        table (str): name of new table
+        columns (dict): column name, datatype & constraints;
+        ie dict(id="serial", name="varchar(75) unique not null")
+
+    Returns:
+        Composed: CREATE TABLE IF NOT EXISTS table (col datatype, ...);
+    """
+
+    # Function to compose 'colname datatype constriant' sql str
+    def define_column(column_info: dict):
+        """Create psycopg composable sql string for
+        defining columns within postgres table
+        ie column_name datatype(length) column_constriant
+
+        Args:
+            column_pairs (Iterable): column names
+        """
+
+        # function used to map to column names
+        def col_sql(col, value):
+            # return sql.SQL(f'"{col}" {value.upper()}')
+            return sql.SQL("{} {}").format(sql.Identifier(col), sql.SQL(value.upper()))
+
+        return [col_sql(k, v) for k, v in column_info.items()]
+
+    return sql.SQL("CREATE TABLE IF NOT EXISTS {} ({});").format(
+        sql.Identifier(table),
+        sql.SQL(", ").join(define_column(columns)),
+    )
+
+
 # =================== Unique Index Snippet ===================
 
 
 def create_unique_index(table, keys):
 
+    # IF NOT EXISTS, index may have been created by concurrent writer
     # Note name will include parenthsis if passed
     # in unique index name
     uix_name = f'{table}_{"_".join(keys)}_uix'
@@ -82,20 +130,54 @@ def create_unique_index(table, keys):
         sqlfunc_keys = map(get_sqlfunc_colname, keys)
 
         # sql snippet to create unique index
-        return sql.SQL("CREATE UNIQUE INDEX {} ON {} ({});").format(
+        return sql.SQL("CREATE UNIQUE INDEX IF NOT EXISTS {} ON {} ({});").format(
             sql.Identifier(uix_name),
             sql.Identifier(table),
             sql.SQL(", ").join(map(colname_snip, sqlfunc_keys)),
         )
 
     # Sql snippet to create unique index
-    return sql.SQL("CREATE UNIQUE INDEX {} ON {} ({});").format(
+    return sql.SQL("CREATE UNIQUE INDEX IF NOT EXISTS {} ON {} ({});").format(
         sql.Identifier(uix_name),
         sql.Identifier(table),
         sql.SQL(", ").join(map(sql.Identifier, keys)),
     )
 
 
+def unique_index_keys_snip(table: str):
+    """Sql snippet selecting key expressions of each valid, non partial
+    unique index on table; ie indexes usable by ON CONFLICT (keys).
+
+    Args:
+        table (str): database table name
+
+    Returns:
+        Composed: SELECT keys FROM pg_index, one row per index ie ['name', 'date(ts)']
+    """
+    return sql.SQL(
+        "SELECT ARRAY(SELECT pg_get_indexdef(i.indexrelid, k, true)"
+        " FROM generate_series(1, i.indnkeyatts) AS k) AS keys"
+        " FROM pg_index AS i"
+        " WHERE i.indrelid = to_regclass(quote_ident({table}))"
+        " AND i.indisunique AND i.indisvalid AND i.indpred IS NULL;"
+    ).format(table=sql.Literal(table))
+
+
+def advisory_lock_snip(name: str):
+    """Sql snippet taking transaction level advisory lock on name;
+    lock is released on commit or rollback.
+
+    Args:
+        name (str): lock name, hashed to lock key
+
+    Returns:
+        Composed: SELECT pg_advisory_xact_lock(hashtext(name));
+    """
+    return sql.SQL("SELECT pg_advisory_xact_lock(hashtext({}));").format(
+        sql.Literal(name)
+    )
+
+
 # =================== Upsert Snippets ===================
 
 # Function to compose col=excluded.col sql for update
@@ -106,8 +188,30 @@ def exclude_sql(col):
     )
 
 
+def values_snip(columns: Iterable, positional: bool = False):
+    """Placeholders of VALUES clause, one per column.
+
+    Args:
+        columns (Iterable): column names
+        positional (bool, optional): un-named placeholders (%s), params passed as
+        tuples in column order; else named (%(col)s), params passed as dict. Defaults to False.
+
+    Returns:
+        Composed: %(col1)s, %(col2)s or %s, %s
+    """
+
+    if positional:
+        return sql.SQL(", ").join(sql.Placeholder() for _ in columns)
+
+    return sql.SQL(", ").join(map(sql.Placeholder, columns))
+
+
 def upsert_snip(
-    table: str, columns: Iterable, keys: Iterable, exclude_update: Iterable = None
+    table: str,
+    columns: Iterable,
+    keys: Iterable,
+    exclude_update: Iterable = None,
+    positional: bool = False,
 ):
 
     update_columns = columns
@@ -128,7 +232,7 @@ def upsert_snip(
         ).format(
             sql.Identifier(table),
             sql.SQL(", ").join(map(sql.Identifier, columns)),
-            sql.SQL(", ").join(map(sql.Placeholder, columns)),
+            values_snip(columns, positional),
             # conflict target
             sql.SQL(", ").join(map(colname_snip, sqlfunc_keys)),
             # set new values
@@ -141,7 +245,7 @@ def upsert_snip(
     ).format(
         sql.Identifier(table),
         sql.SQL(", ").join(map(sql.Identifier, columns)),
-        sql.SQL(", ").join(map(sql.Placeholder, columns)),
+        values_snip(columns, positional),
         # conflict target
         sql.SQL(", ").join(map(sql.Identifier, keys)),
         # set new values
@@ -152,7 +256,7 @@ def upsert_snip(
 # =================== Insert_ignore Snippet ===================
 
 
-def insert_ignore_snip(table: str, columns, keys):
+def insert_ignore_snip(table: str, columns, keys, positional: bool = False):
 
     # If sql function in the any key
     if check_for_func(keys):
@@ -166,7 +270,7 @@ def insert_ignore_snip(table: str, columns, keys):
         ).format(
             sql.Identifier(table),
             sql.SQL(", ").join(map(sql.Identifier, columns)),
-            sql.SQL(", ").join(map(sql.Placeholder, columns)),
+            values_snip(columns, positional),
             # conflict target
             sql.SQL(", ").join(map(colname_snip, sqlfunc_keys)),
         )
@@ -177,7 +281,7 @@ def insert_ignore_snip(table: str, columns, keys):
     ).format(
         sql.Identifier(table),
         sql.SQL(", ").join(map(sql.Identifier, columns)),
-        sql.SQL(", ").join(map(sql.Placeholder, columns)),
+        values_snip(columns, positional),
         # conflict target
         sql.SQL(", ").join(map(sql.Identifier, keys)),
     )
@@ -188,23 +292,22 @@ def insert_ignore_snip(table: str, columns, keys):
 # Note: Seperated from where_snip() to possibly reuse
 # on other dictionaries needing to be composed for other
 # snippets in future
-def compose_key_value(key_value: tuple) -> tuple:
-    """Take key_value tuple from dictionary via .items()
-    and create a composed key_value tuple for use in creating
-    snippets.
+def compose_key_value(colname: str) -> tuple:
+    """Take key (column name) from dictionary and create a
+    composed (column, placeholder) tuple for use in creating
+    snippets. Value is passed as query param so the snippet
+    does not change with values and can be cached.
 
     Args:
-        key_value (tuple): key value pair from dictionary
+        colname (str): key of dictionary, column name
 
     Returns:
-        tuple: composed key value
+        tuple: composed column, composed placeholder
     """
 
-    colname, value = key_value
-
     # TODO: ? add >, <, <>, etc to value to process data other than '='
-    # composed value to literal type
-    composed_value = sql.Literal(value)
+    # un-named placeholder (%s) for value
+    composed_value = sql.Placeholder()
 
     # Check if colname has a function
     if "(" in colname:
@@ -233,10 +336,10 @@ def where_snip(colname_value: tuple):
     """Represent where clause colname=value
 
     Args:
-        colname_value (tuple): _description_
+        colname_value (tuple): composed (column, value)
 
     Returns:
-        _type_: _description_
+        Composed: colname=value
     """
 
     colname, value = colname_value
@@ -245,20 +348,22 @@ def where_snip(colname_value: tuple):
     return sql.SQL("{}={}").format(colname, value)
 
 
-def delete_snip(table: str, where: dict):
+def delete_snip(table: str, where: Iterable):
     """Base sql snippet for delete().
+    Values of where are passed as params in same order, ie
+    cur.execute(delete_snip(table, where), tuple(where.values()))
 
     Args:
         table (str): database table name
-        where (dict): dict(colname=value) that
-        filters value to remove from table
+        where (Iterable): column names of dict(colname=value) that
+        filters value to remove from table; dict can be passed
 
     Returns:
-        _type_: _description_
+        Composed: DELETE FROM table WHERE colname=%s AND ...
     """
 
-    # Pass key-value tuple to compose_key_value()
-    composed_where = map(compose_key_value, where.items())
+    # Pass column names to compose_key_value()
+    composed_where = map(compose_key_value, where)
 
     return sql.SQL("DELETE FROM {} WHERE {};").format(
         sql.Identifier(table),
@@ -269,6 +374,8 @@ def delete_snip(table: str, where: dict):
 # =================== Update Snippets ===================
 
 
+# Cached, same column names are parsed on every call
+@lru_cache(maxsize=1024)
 def get_sqlfunc_colname(colname: str):
     """
     Extract sql function from column name.
@@ -358,15 +465,477 @@ def update_snip(
     )
 
 
-def insert_snip(table: str, columns: Iterable):
+def insert_snip(table: str, columns: Iterable, positional: bool = False):
 
     return sql.SQL("INSERT INTO {} ({}) VALUES ({})").format(
         sql.Identifier(table),
         sql.SQL(", ").join(map(sql.Identifier, columns)),
-        sql.SQL(", ").join(map(sql.Placeholder, columns)),
+        values_snip(columns, positional),
+    )
+
+
+# =================== Copy Snippets ===================
+
+
+def copy_snip(table: str, columns: Iterable, binary: bool = False):
+    """Sql snippet to copy rows from client into table
+    using postgres copy protocol.
+
+    Args:
+        table (str): database table name
+        columns (Iterable): column names in order of copied values
+        binary (bool, optional): use binary copy format. Defaults to False.
+
+    Returns:
+        Composed: COPY table (columns) FROM STDIN
+    """
+
+    if binary:
+        return sql.SQL("COPY {} ({}) FROM STDIN (FORMAT BINARY)").format(
+            sql.Identifier(table),
+            sql.SQL(", ").join(map(sql.Identifier, columns)),
+        )
+
+    return sql.SQL("COPY {} ({}) FROM STDIN").format(
+        sql.Identifier(table),
+        sql.SQL(", ").join(map(sql.Identifier, columns)),
+    )
+
+
+def copy_from_csv_snip(table: str, header: bool = False):
+    """Sql snippet to copy csv file data into table; csv
+    columns must match all table columns in order.
+
+    Args:
+        table (str): database table name
+        header (bool, optional): first line of csv is header & skipped. Defaults to False.
+
+    Returns:
+        Composed: COPY table FROM STDIN WITH (FORMAT csv[, HEADER TRUE])
+    """
+
+    if header:
+        return sql.SQL("COPY {} FROM STDIN WITH (FORMAT csv, HEADER TRUE)").format(
+            sql.Identifier(table)
+        )
+
+    return sql.SQL("COPY {} FROM STDIN WITH (FORMAT csv)").format(sql.Identifier(table))
+
+
+def copy_csv_snip(table: str, columns: Iterable, null: str = "\\N"):
+    """Sql snippet to copy csv rows from client into table;
+    unquoted null string (default \\N) is read as NULL.
+
+    Args:
+        table (str): database table name
+        columns (Iterable): column names in order of csv values
+        null (str, optional): unquoted string read as NULL, "" for
+        empty values (arrow csv). Defaults to "\\N".
+
+    Returns:
+        Composed: COPY table (columns) FROM STDIN (FORMAT csv, NULL '\\N')
+    """
+
+    return sql.SQL("COPY {} ({}) FROM STDIN (FORMAT csv, NULL {})").format(
+        sql.Identifier(table),
+        sql.SQL(", ").join(map(sql.Identifier, columns)),
+        sql.Literal(null),
+    )
+
+
+def copy_to_snip(source: str, header: bool = True):
+    """Sql snippet to copy table or query results to client
+    as csv using postgres copy protocol.
+
+    Args:
+        source (str): table name or query (SELECT/WITH/VALUES/TABLE ...)
+        header (bool, optional): first line of csv has column names. Defaults to True.
+
+    Returns:
+        Composed: COPY table|(query) TO STDOUT WITH (FORMAT csv, HEADER bool)
+    """
+
+    if __query_pattern.match(source):
+        # Query is wrapped in parenthesis, trailing ';' not allowed
+        source_sql = sql.SQL("({})").format(sql.SQL(source.strip().rstrip(";")))
+    else:
+        source_sql = sql.Identifier(source)
+
+    return sql.SQL("COPY {} TO STDOUT WITH (FORMAT csv, HEADER {})").format(
+        source_sql, sql.SQL("TRUE" if header else "FALSE")
+    )
+
+
+def table_schema_snip(table: str):
+    """Sql snippet selecting columns of table with type oid & type name,
+    in table column order.
+
+    Args:
+        table (str): database table name
+
+    Returns:
+        Composed: SELECT attname, atttypid, format_type(...) FROM pg_attribute
+    """
+
+    return sql.SQL(
+        "SELECT a.attname, a.atttypid::int, format_type(a.atttypid, a.atttypmod)"
+        " FROM pg_attribute AS a"
+        " WHERE a.attrelid = to_regclass(quote_ident({table}))"
+        " AND a.attnum > 0 AND NOT a.attisdropped"
+        " ORDER BY a.attnum;"
+    ).format(table=sql.Literal(table))
+
+
+# =================== Staging Table Snippets ===================
+
+
+def staging_table_snip(staging: str, table: str, columns: Iterable):
+    """Sql snippet to create empty temporary staging table
+    with same column types as columns of table.
+
+    Args:
+        staging (str): staging table name
+        table (str): database table name
+        columns (Iterable): column names
+
+    Returns:
+        Composed: CREATE TEMP TABLE staging AS SELECT columns FROM table WITH NO DATA
+    """
+
+    return sql.SQL("CREATE TEMP TABLE {} AS SELECT {} FROM {} WITH NO DATA;").format(
+        sql.Identifier(staging),
+        sql.SQL(", ").join(map(sql.Identifier, columns)),
+        sql.Identifier(table),
     )
 
 
+def drop_table_snip(table: str):
+
+    return sql.SQL("DROP TABLE IF EXISTS {};").format(sql.Identifier(table))
+
+
+def upsert_select_snip(
+    table: str,
+    staging: str,
+    columns: Iterable,
+    keys: Iterable,
+    exclude_update: Iterable = None,
+):
+    """Sql snippet to upsert all rows of staging table into table
+    in one statement. If staging has rows with same keys, the last
+    copied row is used (same result as upserting row by row).
+
+    Args:
+        table (str): database table name
+        staging (str): staging table name
+        columns (Iterable): column names
+        keys (Iterable): conflict target columns, may include sql func ie Date(ts)
+        exclude_update (Iterable, optional): exclude columns from update. Defaults to None.
+
+    Returns:
+        Composed: INSERT INTO table SELECT ... FROM staging ON CONFLICT DO UPDATE SET
+    """
+
+    update_columns = columns
+
+    # if exclude columns from update then determine update_columns
+    if exclude_update:
+        update_columns = util.iterable_difference(columns, exclude_update)
+
+    # Key expressions, ie "name" or DATE("ts")
+    key_snip = sql.SQL(", ").join(map(colname_snip, map(get_sqlfunc_colname, keys)))
+
+    # DISTINCT ON keeps one row per key; rows copied last have highest ctid
+    return sql.SQL(
+        "INSERT INTO {} ({}) SELECT DISTINCT ON ({}) {} FROM {} ORDER BY {}, ctid DESC"
+        " ON CONFLICT ({}) DO UPDATE SET {};"
+    ).format(
+        sql.Identifier(table),
+        sql.SQL(", ").join(map(sql.Identifier, columns)),
+        key_snip,
+        sql.SQL(", ").join(map(sql.Identifier, columns)),
+        sql.Identifier(staging),
+        key_snip,
+        # conflict target
+        key_snip,
+        # set new values
+        sql.SQL(", ").join(map(exclude_sql, update_columns)),
+    )
+
+
+def qualified_colname_snip(alias: str, sqlfunc_colname: tuple):
+    """Same as colname_snip() with column qualified by table alias,
+    ie "t"."name" or DATE("t"."ts").
+
+    Args:
+        alias (str): table name or alias
+        sqlfunc_colname (tuple): (sqlfunc, colname)
+
+    Returns:
+        Composed: snippet of sql statment
+    """
+    sqlfunc, colname = sqlfunc_colname
+
+    if sqlfunc is None:
+        return sql.Identifier(alias, colname)
+
+    return sql.SQL("{}({})").format(sql.SQL(sqlfunc), sql.Identifier(alias, colname))
+
+
+def distinct_src_snip(staging: str, columns: Iterable, keys: Iterable):
+    """Sql snippet selecting one row per keys from staging table; if staging
+    has rows with same keys, the last copied row is used.
+
+    Args:
+        staging (str): staging table name
+        columns (Iterable): column names
+        keys (Iterable): columns used to match rows, may include sql func ie Date(ts)
+
+    Returns:
+        Composed: SELECT DISTINCT ON (keys) columns FROM staging ORDER BY keys, ctid DESC
+    """
+
+    # Key expressions, ie "name" or DATE("ts")
+    key_snip = sql.SQL(", ").join(
+        colname_snip(get_sqlfunc_colname(key)) for key in keys
+    )
+
+    return sql.SQL(
+        "SELECT DISTINCT ON ({keys}) {cols} FROM {staging} ORDER BY {keys}, ctid DESC"
+    ).format(
+        keys=key_snip,
+        cols=sql.SQL(", ").join(map(sql.Identifier, columns)),
+        staging=sql.Identifier(staging),
+    )
+
+
+def key_match_snip(keys: Iterable):
+    """Sql snippet matching rows of table (alias t) with rows of src on all keys.
+
+    Args:
+        keys (Iterable): columns used to match rows, may include sql func ie Date(ts)
+
+    Returns:
+        Composed: t.key=src.key AND DATE(t.ts)=DATE(src.ts) ...
+    """
+
+    return sql.SQL(" AND ").join(
+        sql.SQL("{}={}").format(
+            qualified_colname_snip("t", key), qualified_colname_snip("src", key)
+        )
+        for key in map(get_sqlfunc_colname, keys)
+    )
+
+
+def upsert_noindex_snip(
+    table: str,
+    staging: str,
+    columns: Iterable,
+    keys: Iterable,
+    exclude_update: Iterable = None,
+):
+    """Sql snippet to upsert all rows of staging table into table in one
+    statement without a unique index; rows matching keys are updated
+    (UPDATE ... FROM), other rows inserted (INSERT ... WHERE NOT EXISTS).
+    If staging has rows with same keys, the last copied row is used.
+
+    Args:
+        table (str): database table name
+        staging (str): staging table name
+        columns (Iterable): column names
+        keys (Iterable): columns used to match rows, may include sql func ie Date(ts)
+        exclude_update (Iterable, optional): exclude columns from update. Defaults to None.
+
+    Returns:
+        Composed: WITH src, upd AS (UPDATE), ins AS (INSERT) SELECT updated, inserted
+    """
+
+    update_columns = columns
+
+    # if exclude columns from update then determine update_columns
+    if exclude_update:
+        update_columns = util.iterable_difference(columns, exclude_update)
+
+    def set_sql(col):
+        return sql.SQL("{}={}").format(sql.Identifier(col), sql.Identifier("src", col))
+
+    # Both statements see table as it was before update, rows
+    # updated by upd are excluded from insert by NOT EXISTS
+    return sql.SQL(
+        "WITH src AS ({src}),"
+        " upd AS (UPDATE {table} AS t SET {set} FROM src WHERE {match} RETURNING 1),"
+        " ins AS (INSERT INTO {table} ({cols}) SELECT {cols} FROM src"
+        " WHERE NOT EXISTS (SELECT 1 FROM {table} AS t WHERE {match}) RETURNING 1)"
+        " SELECT (SELECT count(*) FROM upd) AS updated,"
+        " (SELECT count(*) FROM ins) AS inserted;"
+    ).format(
+        src=distinct_src_snip(staging=staging, columns=columns, keys=keys),
+        cols=sql.SQL(", ").join(map(sql.Identifier, columns)),
+        table=sql.Identifier(table),
+        set=sql.SQL(", ").join(map(set_sql, update_columns)),
+        match=key_match_snip(keys),
+    )
+
+
+def upsert_merge_snip(
+    table: str,
+    staging: str,
+    columns: Iterable,
+    keys: Iterable,
+    exclude_update: Iterable = None,
+    returning: bool = False,
+):
+    """Sql snippet to upsert all rows of staging table into table with one
+    MERGE statement (PostgreSQL 15+); no unique index required.
+    If staging has rows with same keys, the last copied row is used.
+
+    Args:
+        table (str): database table name
+        staging (str): staging table name
+        columns (Iterable): column names
+        keys (Iterable): columns used to match rows, may include sql func ie Date(ts)
+        exclude_update (Iterable, optional): exclude columns from update. Defaults to None.
+        returning (bool, optional): wrap MERGE ... RETURNING merge_action() to select
+        updated & inserted counts (PostgreSQL 17+). Defaults to False.
+
+    Returns:
+        Composed: MERGE INTO table USING src ON keys WHEN MATCHED THEN UPDATE
+        WHEN NOT MATCHED THEN INSERT
+    """
+
+    update_columns = columns
+
+    # if exclude columns from update then determine update_columns
+    if exclude_update:
+        update_columns = util.iterable_difference(columns, exclude_update)
+
+    def set_sql(col):
+        return sql.SQL("{}={}").format(sql.Identifier(col), sql.Identifier("src", col))
+
+    merge = sql.SQL(
+        "MERGE INTO {table} AS t USING ({src}) AS src ON {match}"
+        " WHEN MATCHED THEN UPDATE SET {set}"
+        " WHEN NOT MATCHED THEN INSERT ({cols}) VALUES ({src_cols})"
+    ).format(
+        table=sql.Identifier(table),
+        src=distinct_src_snip(staging=staging, columns=columns, keys=keys),
+        match=key_match_snip(keys),
+        set=sql.SQL(", ").join(map(set_sql, update_columns)),
+        cols=sql.SQL(", ").join(map(sql.Identifier, columns)),
+        src_cols=sql.SQL(", ").join(sql.Identifier("src", col) for col in columns),
+    )
+
+    if not returning:
+        return merge + sql.SQL(";")
+
+    return sql.SQL(
+        "WITH m AS ({merge} RETURNING merge_action() AS action)"
+        " SELECT count(*) FILTER (WHERE action = 'UPDATE') AS updated,"
+        " count(*) FILTER (WHERE action = 'INSERT') AS inserted FROM m;"
+    ).format(merge=merge)
+
+
+def unmatched_count_snip(table: str, staging: str, columns: Iterable, keys: Iterable):
+    """Sql snippet counting rows of staging table (one per keys) that match no
+    row of table on keys; ie # of rows an upsert from staging would insert.
+
+    Args:
+        table (str): database table name
+        staging (str): staging table name
+        columns (Iterable): column names
+        keys (Iterable): columns used to match rows, may include sql func ie Date(ts)
+
+    Returns:
+        Composed: SELECT count(*) FROM src WHERE NOT EXISTS (...)
+    """
+
+    return sql.SQL(
+        "SELECT count(*) FROM ({src}) AS src"
+        " WHERE NOT EXISTS (SELECT 1 FROM {table} AS t WHERE {match});"
+    ).format(
+        src=distinct_src_snip(staging=staging, columns=columns, keys=keys),
+        table=sql.Identifier(table),
+        match=key_match_snip(keys),
+    )
+
+
+# =================== Snippet Cache ===================
+
+# Max number of rendered snippets kept, least recently used are dropped
+cache_size: int = 512
+
+__snip_funcs = {
+    "insert": insert_snip,
+    "insert_ignore": insert_ignore_snip,
+    "upsert": upsert_snip,
+    "update": update_snip,
+    "create_unique_index": create_unique_index,
+    "delete": delete_snip,
+}
+
+__cache = OrderedDict()
+__cache_lock = threading.Lock()
+__cache_stats = {"hits": 0, "misses": 0}
+
+
+def render_snip(conn, operation: str, table: str, **params) -> bytes:
+    """Return snippet rendered to query bytes; snippets are composed
+    and rendered once per (operation, table, params) then served
+    from a bounded LRU cache.
+
+    Args:
+        conn (Connection): connection used to render (escape/encode) snippet
+        operation (str): insert, insert_ignore, upsert, update, create_unique_index or delete
+        table (str): database table name
+        **params: arguments of snippet function, ie columns, keys, exclude_update, where, positional
+
+    Example:
+        qry = render_snip(conn, "upsert", table="mytable", columns=("name", "age"), keys=["name"])
+        cur.executemany(qry, rows)
+
+    Returns:
+        bytes: rendered sql query
+    """
+
+    # Iterables converted to tuples to be hashable, flags (ie positional) kept
+    params = {
+        k: tuple(v) if isinstance(v, Iterable) and not isinstance(v, str) else v
+        for k, v in params.items()
+    }
+    key = (operation, table, conn.info.encoding, *sorted(params.items()))
+
+    with __cache_lock:
+        query = __cache.get(key)
+        if query is not None:
+            __cache.move_to_end(key)
+            __cache_stats["hits"] += 1
+            return query
+        __cache_stats["misses"] += 1
+
+    query = __snip_funcs[operation](table=table, **params).as_bytes(conn)
+
+    with __cache_lock:
+        __cache[key] = query
+        if len(__cache) > cache_size:
+            # drop least recently used
+            __cache.popitem(last=False)
+
+    return query
+
+
+def cache_info() -> dict:
+    """Return snippet cache hits, misses, size and maxsize."""
+    with __cache_lock:
+        return {**__cache_stats, "size": len(__cache), "maxsize": cache_size}
+
+
+def cache_clear() -> None:
+    """Clear snippet cache and reset hit/miss counters."""
+    with __cache_lock:
+        __cache.clear()
+        __cache_stats.update(hits=0, misses=0)
+
+
 if __name__ == "__main__":
     # dev testing, remove later
     import os
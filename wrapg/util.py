@@ -1,6 +1,25 @@
-from collections.abc import Iterable
+import os
+import gzip
+import json
+from itertools import islice
+from operator import itemgetter
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
 import pandas as pd
-from numpy import nan
+from psycopg.postgres import types as pg_types
+
+# Optional, only needed for compression="zstd"
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Optional, only needed for pyarrow.Table/RecordBatch & polars.DataFrame data
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
 
 
 def check_all_dicts(iterable_dict: Iterable[dict]):
@@ -55,24 +74,206 @@ def uniform_dict_keys(iterable_dict: Iterable[dict]) -> int:
     return len(keys)
 
 
-def data_transform(data_structure):
+def frame_arrays(df: pd.DataFrame) -> list:
+    """Return columns of dataframe as arrays of python objects;
+    NaN/NaT/NA values are set to None (NULL) per column, vectorized.
+
+    Args:
+        df (pd.DataFrame): data
+
+    Returns:
+        list[np.ndarray]: one object array per column, in column order
+    """
+    arrays = []
+    # By position in case of duplicate column names
+    for i in range(df.shape[1]):
+        column = df.iloc[:, i]
+        array = column.to_numpy(dtype=object)
+
+        missing = column.isna().to_numpy()
+        if missing.any():
+            # Object columns may share memory with df, do not modify df
+            if column.dtype == object:
+                array = array.copy()
+            array[missing] = None
+
+        arrays.append(array)
+
+    return arrays
+
+
+def scan_rows(
+    iterable_dict: Iterable[dict], ordered: bool = False
+) -> list[tuple[tuple, list[dict]]]:
+    """
+    Validate rows are dictionaries and group them by keys (column shape)
+    in one pass. Key view of each row is compared to first row, no
+    allocation per row; grouping only starts at first mismatch.
+    Order of keys does not matter, same as uniform_dict_keys().
+
+    Args:
+        iterable_dict (Iterable[dict]): list/tuple of dictionaries
+        representing data to be processed into database
+        ordered (bool, optional): group consecutive rows of same keys only, rows
+        run in data order; needed when rows with same key (upsert/update) must be
+        applied in order. Defaults to False, one group per unique set of keys.
+
+    Returns:
+        list[tuple]: [(columns, rows), ...] one item per unique set of keys
+        (per run of same keys if ordered); uniform data returns one group
+        holding iterable_dict itself
+    """
+
+    if not iterable_dict:
+        raise ValueError(f"Empty list passed, must contain at least one dictionary.")
+
+    first = iterable_dict[0]
+    if not isinstance(first, dict):
+        raise BaseException("Iterable has mixed types, expected Iterable[dictionaries]")
+
+    # Key views compare as sets, ie order of keys does not matter
+    keys = first.keys()
+    for i, row in enumerate(iterable_dict):
+        if not isinstance(row, dict):
+            raise BaseException(
+                "Iterable has mixed types, expected Iterable[dictionaries]"
+            )
+        if row.keys() != keys:
+            break
+    else:
+        # Uniform, one group; rows are not copied
+        return [(tuple(first), iterable_dict)]
+
+    # Non uniform from row i on, rows before i share keys of first row
+    if ordered:
+        runs = [(tuple(first), list(iterable_dict[:i]))]
+        for row in iterable_dict[i:]:
+            if not isinstance(row, dict):
+                raise BaseException(
+                    "Iterable has mixed types, expected Iterable[dictionaries]"
+                )
+
+            # New run each time keys change
+            if row.keys() != keys:
+                keys = row.keys()
+                runs.append((tuple(row), []))
+
+            runs[-1][1].append(row)
+
+        return runs
+
+    groups = {frozenset(keys): (tuple(first), list(iterable_dict[:i]))}
+    for row in iterable_dict[i:]:
+        if not isinstance(row, dict):
+            raise BaseException(
+                "Iterable has mixed types, expected Iterable[dictionaries]"
+            )
+        shape = frozenset(row)
+
+        # New shape, start group using keys of this row as columns
+        if shape not in groups:
+            groups[shape] = (tuple(row), [])
+
+        groups[shape][1].append(row)
+
+    return list(groups.values())
+
+
+def is_stream(data) -> bool:
+    """Return True if data is an iterable other than the data
+    structures handled by data_transform(), ie generator, iterator,
+    set, dict_values; these are consumed in chunks.
+
+    Args:
+        data (Any): data passed to insert/upsert/etc
+    """
+    return (
+        isinstance(data, Iterable)
+        and not isinstance(data, (list, tuple, dict, str, bytes, pd.DataFrame))
+        # polars DataFrame iterates over columns
+        and not is_arrow(data)
+    )
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    """Yield lists of up to size items from iterable; only one
+    chunk is held in memory at a time.
+
+    Args:
+        iterable (Iterable): any iterable, ie generator
+        size (int): max # of items per chunk
+
+    Yields:
+        list: chunk of items
+    """
+    if size < 1:
+        raise ValueError(f"Chunk size must be at least 1, got {size}.")
+
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def partition(data_structure, parts: int) -> list:
+    """Split list/tuple of dict, dataframe or arrow table into up to 'parts'
+    contiguous slices of about equal size; other data structures
+    (ie dict) are returned as one part.
+
+    Args:
+        data_structure (Any): data to split
+        parts (int): max # of slices
+
+    Returns:
+        list: slices of data_structure
+    """
+    if parts > 1 and is_arrow(data_structure):
+        data_structure = arrow_table(data_structure)
+
+    if (
+        parts <= 1
+        or not (isinstance(data_structure, (list, tuple)) or is_frame(data_structure))
+        or len(data_structure) <= 1
+    ):
+        return [data_structure]
+
+    # Round up, last slice may be smaller
+    size = -(-len(data_structure) // parts)
+
+    if isinstance(data_structure, pd.DataFrame):
+        return [
+            data_structure.iloc[i : i + size]
+            for i in range(0, len(data_structure), size)
+        ]
+
+    # Arrow slices are zero copy views
+    if is_arrow(data_structure):
+        return [
+            data_structure.slice(i, size) for i in range(0, len(data_structure), size)
+        ]
+
+    return [data_structure[i : i + size] for i in range(0, len(data_structure), size)]
+
+
+def data_transform(data_structure, positional: bool = False):
     """Internal function checks passed data structure and
     returns tuple of columns and Iterable of rows(dictionaries)
 
     Args:
         data_structure (Any): data needing to be inserted/
-        updated/etc into postgres (type: dataframe,
-        list/tuple of dict, dict)
+        updated/etc into postgres (type: dataframe, pyarrow
+        table/record batch, polars dataframe, list/tuple of dict, dict)
+        positional (bool, optional): return dataframe/arrow rows as tuples in
+        column order, for un-named (%s) placeholders. Other data
+        structures are always returned as dict. Defaults to False.
 
     Returns:
-        column, row, uniform: tuple(column_names), Iterable(dict), int
+        column, row, uniform: tuple(column_names), Iterable(dict | tuple), int
         uniform = 1 indicates all dictionaries have same keys
     """
 
     # =================== TODO ===================
     # TODO: handle json data, named tuple?
-    # TODO: handle iterator?
-    # TODO: test if returning rows of tuples faster to process?
+    # Note: iterators are chunked into lists by callers, see chunked()
 
     # structural pattern matching for data_structure passed
     match data_structure:
@@ -92,14 +293,35 @@ def data_transform(data_structure):
 
             columns = tuple(data_structure.columns)
             # in case a df with nan is passed, None needed for sql
-            df = data_structure.replace(nan, None)
-            # returns list of dictionaries
-            rows = df.to_dict(orient="records")
+            # converted per column, no copy of whole df
+            arrays = frame_arrays(data_structure)
+
+            if positional:
+                # Tuples, no dict allocated per row; see executemany %s
+                rows = list(zip(*arrays))
+            else:
+                # returns list of dictionaries
+                rows = [dict(zip(columns, row)) for row in zip(*arrays)]
             uniform = 1
 
             # print(rows)
             return columns, rows, uniform
 
+        case _ if is_arrow(data_structure):
+            """
+            Arrow table/record batch or polars dataframe; uniform,
+            nulls are None. Only used for executemany, COPY writes
+            arrow data directly, see arrow_csv()
+            """
+            table = arrow_table(data_structure)
+            columns = tuple(table.column_names)
+            rows = list(arrow_values(table))
+
+            if not positional:
+                rows = [dict(zip(columns, row)) for row in rows]
+
+            return columns, rows, 1
+
         case list() | tuple():
             # print("type -> list/tuple of dictionaries")
 
@@ -113,18 +335,18 @@ def data_transform(data_structure):
             # df = df.replace(nan, None)
             # rows = list(df.itertuples(index=False, name=None))
 
-            # Check all instances in data structure are dictionaires
-            if check_all_dicts(data_structure):
+            # Check all instances are dictionaires & group by keys, one pass
+            groups = scan_rows(data_structure)
 
-                # Return tuple(dict.keys of first instance in Iterable)
-                # If not uniform program will iterate over instance
-                # if uniform, checking first instance is good enough
-                columns = tuple(data_structure[0])
+            # Return tuple(dict.keys of first instance in Iterable)
+            # If not uniform program will iterate over instance
+            # if uniform, checking first instance is good enough
+            columns = groups[0][0]
 
-                # Check if all dictionaries have same keys
-                uniform = uniform_dict_keys(data_structure)
+            # 1 if all dictionaries have same keys
+            uniform = len(groups)
 
-                return columns, data_structure, uniform
+            return columns, data_structure, uniform
 
         case dict():
             # print("type -> dictionary")
@@ -140,16 +362,515 @@ def data_transform(data_structure):
 
             return columns, row, uniform
 
-        case []:
-            raise ValueError(
-                f"Empty list passed, must contain at least one dictionary."
-            )
-
         case _:
             raise ValueError(f"Unsupported data structure passed.")
 
 
 
+def null_nan(value):
+    """Return None for NaN/NaT/NA values, postgres
+    needs None for NULL; otherwise return value.
+    """
+    # NaN is only value not equal to itself
+    if (
+        value is pd.NaT
+        or value is pd.NA
+        or (isinstance(value, float) and value != value)
+    ):
+        return None
+    return value
+
+
+def copy_values(row: dict, columns: tuple) -> tuple:
+    """Return values of row dictionary in column order for
+    postgres copy; NaN/NaT/NA values are converted to None (NULL).
+
+    Args:
+        row (dict): row of data
+        columns (tuple): column names in order of copy statement
+
+    Returns:
+        tuple: row values
+    """
+    return tuple(null_nan(row[col]) for col in columns)
+
+
+def frame_values(df: pd.DataFrame, chunk_size: int = 100_000) -> Iterable[tuple]:
+    """Yield rows of dataframe as tuples for postgres copy, built from
+    column arrays chunk_size rows at a time; NaN/NaT/NA values are
+    converted to None (NULL).
+
+    Args:
+        df (pd.DataFrame): data
+        chunk_size (int, optional): # of rows converted at a time. Defaults to 100_000.
+
+    Yields:
+        tuple: row values in column order
+    """
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start : start + chunk_size]
+
+        # Python objects per column, missing values already None
+        yield from zip(*frame_arrays(chunk))
+
+
+# Type oids of postgres integer columns (int2, int4, int8)
+int_oids: frozenset = frozenset(
+    pg_types.get(name).oid for name in ("int2", "int4", "int8")
+)
+
+
+def integral_floats(df: pd.DataFrame, types: list) -> pd.DataFrame:
+    """Return dataframe with float columns of integer table columns cast to
+    nullable Int64. NaN turns a pandas int column into floats; COPY would
+    write 4.0 which postgres rejects for integer columns. Columns with
+    fractional values are left as is. df itself is not modified.
+
+    Args:
+        df (pd.DataFrame): data
+        types (list): type oid of table column, per df column
+
+    Returns:
+        pd.DataFrame: df, or shallow copy with cast columns
+    """
+    cast = {}
+    for i, oid in enumerate(types):
+        column = df.iloc[:, i]
+        if oid not in int_oids or column.dtype.kind != "f":
+            continue
+        if (column.dropna() % 1 == 0).all():
+            cast[i] = column.astype("Int64")
+
+    if not cast:
+        return df
+
+    # By position in case of duplicate column names
+    df = df.copy(deep=False)
+    for i, column in cast.items():
+        df.isetitem(i, column)
+    return df
+
+
+def integral_values(rows: Iterable[tuple], types: list) -> Iterator[tuple]:
+    """Yield rows with integral float values of integer columns as int,
+    ie 4.0 -> 4. Dataframe int columns with NaN are float; COPY would
+    write 4.0 which postgres rejects for integer columns. Rows without
+    such values are yielded as is.
+
+    Args:
+        rows (Iterable[tuple]): rows of values in column order
+        types (list): type oid of table column, per value
+
+    Yields:
+        tuple: row values in column order
+    """
+    ints = [i for i, oid in enumerate(types) if oid in int_oids]
+    if not ints:
+        yield from rows
+        return
+
+    for row in rows:
+        if any(isinstance(row[i], float) for i in ints):
+            row = list(row)
+            for i in ints:
+                value = row[i]
+                if isinstance(value, float) and value.is_integer():
+                    row[i] = int(value)
+            row = tuple(row)
+        yield row
+
+
+def row_count(data_structure) -> int:
+    """Return # of rows of dict (1), list/tuple of dict, dataframe or arrow data."""
+    if isinstance(data_structure, dict):
+        return 1
+    return len(data_structure)
+
+
+def batches(data_structure, size: int | None, skip: int = 0) -> Iterator:
+    """Yield contiguous batches of up to size rows from any data accepted
+    by write functions, after skipping first 'skip' rows. Lists, dataframes
+    & arrow tables are sliced (arrow zero copy), iterators are chunked.
+
+    Args:
+        data_structure (Any): dict, list/tuple of dict, dataframe, arrow/polars or iterator
+        size (int | None): max # of rows per batch, None for one batch
+        (iterators need a size)
+        skip (int, optional): # of leading rows skipped, ie already written. Defaults to 0.
+
+    Yields:
+        Any: batch, same kind as data_structure (lists for iterators)
+    """
+    if is_stream(data_structure):
+        iterator = islice(iter(data_structure), skip, None)
+        yield from chunked(iterator, size)
+        return
+
+    if isinstance(data_structure, dict):
+        data_structure = [data_structure]
+    elif is_arrow(data_structure):
+        data_structure = arrow_table(data_structure)
+
+    n_rows = len(data_structure)
+    size = size or max(n_rows - skip, 1)
+
+    for start in range(skip, n_rows, size):
+        if isinstance(data_structure, pd.DataFrame):
+            yield data_structure.iloc[start : start + size]
+        elif is_arrow(data_structure):
+            yield data_structure.slice(start, size)
+        else:
+            yield data_structure[start : start + size]
+
+
+# =================== Arrow / Polars ===================
+
+
+def is_arrow(data) -> bool:
+    """Return True if data is pyarrow Table/RecordBatch or polars DataFrame.
+
+    Args:
+        data (Any): data passed to insert/upsert/etc
+    """
+    if pa is not None and isinstance(data, (pa.Table, pa.RecordBatch)):
+        return True
+
+    # Checked by name, polars is not imported by wrapg
+    cls = type(data)
+    return cls.__name__ == "DataFrame" and cls.__module__.startswith("polars.")
+
+
+def is_frame(data) -> bool:
+    """Return True if data is a columnar frame (pandas, arrow or polars);
+    rows are sent as tuples for un-named (%s) placeholders.
+    """
+    return isinstance(data, pd.DataFrame) or is_arrow(data)
+
+
+def arrow_table(data) -> "pa.Table":
+    """Return pyarrow Table of pyarrow Table/RecordBatch or polars DataFrame;
+    no data is copied (polars.DataFrame.to_arrow() shares buffers).
+
+    Args:
+        data (pa.Table | pa.RecordBatch | polars.DataFrame): data
+
+    Raises:
+        ImportError: pyarrow not installed
+
+    Returns:
+        pa.Table: data
+    """
+    if pa is None:
+        raise ImportError(
+            "pyarrow is required for arrow/polars data, pip install wrapg[arrow]"
+        )
+
+    if not isinstance(data, (pa.Table, pa.RecordBatch)):
+        data = data.to_arrow()
+
+    if isinstance(data, pa.RecordBatch):
+        data = pa.Table.from_batches([data])
+
+    return data
+
+
+def arrow_values(table: "pa.Table", chunk_size: int = 100_000) -> Iterable[tuple]:
+    """Yield rows of arrow table as tuples of python objects for postgres
+    copy/executemany, built one record batch of chunk_size rows at a time;
+    nulls are None.
+
+    Args:
+        table (pa.Table): data
+        chunk_size (int, optional): max # of rows converted at a time. Defaults to 100_000.
+
+    Yields:
+        tuple: row values in column order
+    """
+    for batch in table.to_batches(max_chunksize=chunk_size):
+        yield from zip(*(col.to_pylist() for col in batch.columns))
+
+
+def arrow_csv(table: "pa.Table", chunk_size: int = 100_000) -> Iterator[memoryview]:
+    """Yield arrow table as csv blocks (no header) for postgres COPY, written
+    by arrow's csv writer one record batch at a time; no python object is
+    created per value. Strings are quoted, nulls are written unquoted empty.
+
+    Args:
+        table (pa.Table): data
+        chunk_size (int, optional): max # of rows per block. Defaults to 100_000.
+
+    Yields:
+        memoryview: csv block
+    """
+    options = pa_csv.WriteOptions(include_header=False)
+
+    for batch in table.to_batches(max_chunksize=chunk_size):
+        sink = pa.BufferOutputStream()
+        pa_csv.write_csv(batch, sink, write_options=options)
+        yield memoryview(sink.getvalue())
+
+
+# Postgres types mapped to pandas dtypes, used to build query(to_df=True) frames.
+# Nullable pandas dtypes keep NULL as <NA> without casting ints to float.
+# Types not listed (text, numeric, json, uuid...) stay python objects;
+# numeric is left as Decimal so no precision is lost.
+pg_dtypes: dict = {
+    "int2": "Int16",
+    "int4": "Int32",
+    "int8": "Int64",
+    "oid": "Int64",
+    "float4": "float32",
+    "float8": "float64",
+    "bool": "boolean",
+    "date": "datetime",
+    "timestamp": "datetime",
+    "timestamptz": "datetime",
+}
+
+# Same map keyed by type oid, as found in cursor.description type_code
+oid_dtypes: dict = {pg_types.get(name).oid: dtype for name, dtype in pg_dtypes.items()}
+
+
+def typed_column(values: Iterable, dtype: str = None) -> pd.Series:
+    """Return column values as pandas series of dtype; values
+    that cannot be converted (ie out of bounds dates) fall back
+    to python objects, same as dtype=None.
+
+    Args:
+        values (Iterable): column values, None for NULL
+        dtype (str, optional): pandas dtype or "datetime". Defaults to None.
+
+    Returns:
+        pd.Series: column
+    """
+    try:
+        if dtype == "datetime":
+            # Keeps timezone of timestamptz values, NULL -> NaT
+            return pd.Series(pd.to_datetime(values))
+        if dtype is not None:
+            return pd.Series(values, dtype=dtype)
+    except (ValueError, TypeError, OverflowError):
+        pass
+
+    return pd.Series(values, dtype="object")
+
+
+def row_columns(rows: list[tuple], n_columns: int) -> list[list]:
+    """Transpose tuple rows of a query to column lists; empty result
+    still gets its columns. One pass per column (itemgetter), much
+    faster than zip(*rows) on large results.
+
+    Args:
+        rows (list[tuple]): rows of query
+        n_columns (int): # of columns, ie len(cursor.description)
+
+    Returns:
+        list[list]: values per column
+    """
+    return [list(map(itemgetter(i), rows)) for i in range(n_columns)]
+
+
+def rows_to_df(rows: list[tuple], description) -> pd.DataFrame:
+    """Build dataframe column by column from tuple rows of a
+    query; column dtypes are taken from type oids of cursor.
+
+    Args:
+        rows (list[tuple]): rows of query, ie cursor.fetchall() using tuple_row
+        description (list[psycopg.Column]): cursor.description
+
+    Returns:
+        pd.DataFrame: dataframe with typed columns
+    """
+    columns = row_columns(rows, len(description))
+
+    df = pd.DataFrame(
+        {
+            i: typed_column(values, oid_dtypes.get(col.type_code))
+            for i, (col, values) in enumerate(zip(description, columns))
+        }
+    )
+    # Set names after building frame, query may return duplicate names
+    df.columns = [col.name for col in description]
+
+    return df
+
+
+# Postgres types mapped to arrow types, used to build query(to_arrow=True) batches.
+# Types not listed (numeric, json, arrays, uuid...) are inferred by arrow from
+# values; values arrow cannot convert (ie ranges, mixed json) are kept as text.
+pg_arrow_types: dict = {}
+if pa is not None:
+    pg_arrow_types = {
+        "int2": pa.int16(),
+        "int4": pa.int32(),
+        "int8": pa.int64(),
+        "oid": pa.int64(),
+        "float4": pa.float32(),
+        "float8": pa.float64(),
+        "bool": pa.bool_(),
+        "text": pa.string(),
+        "varchar": pa.string(),
+        "bpchar": pa.string(),
+        "name": pa.string(),
+        "bytea": pa.binary(),
+        "date": pa.date32(),
+        "timestamp": pa.timestamp("us"),
+        # aware datetimes are stored as UTC instants
+        "timestamptz": pa.timestamp("us", tz="UTC"),
+        "time": pa.time64("us"),
+        "interval": pa.duration("us"),
+    }
+
+# Same map keyed by type oid, as found in cursor.description type_code
+oid_arrow_types: dict = {
+    pg_types.get(name).oid: pa_type for name, pa_type in pg_arrow_types.items()
+}
+
+
+def arrow_column(values: Iterable, pa_type=None) -> "pa.Array":
+    """Return column values as arrow array of pa_type (inferred if None);
+    values arrow cannot convert are kept as text, json values as json text.
+
+    Args:
+        values (Iterable): column values, None for NULL
+        pa_type (pa.DataType, optional): arrow type. Defaults to None.
+
+    Returns:
+        pa.Array: column
+    """
+    try:
+        return pa.array(values, type=pa_type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        pass
+
+    def text(value):
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, default=str)
+        return str(value)
+
+    return pa.array([None if v is None else text(v) for v in values], type=pa.string())
+
+
+def rows_to_arrow(rows: list[tuple], description) -> "pa.RecordBatch":
+    """Build arrow record batch column by column from tuple rows of a
+    query; column types are taken from type oids of cursor.
+
+    Args:
+        rows (list[tuple]): rows of query, ie cursor.fetchmany() using tuple_row
+        description (list[psycopg.Column]): cursor.description
+
+    Raises:
+        ImportError: pyarrow not installed
+
+    Returns:
+        pa.RecordBatch: batch with typed columns
+    """
+    if pa is None:
+        raise ImportError("pyarrow is required for to_arrow, pip install wrapg[arrow]")
+
+    columns = row_columns(rows, len(description))
+
+    return pa.RecordBatch.from_arrays(
+        [
+            arrow_column(values, oid_arrow_types.get(col.type_code))
+            for col, values in zip(description, columns)
+        ],
+        names=[col.name for col in description],
+    )
+
+
+def batches_to_table(batches: Iterable) -> "pa.Table":
+    """Return arrow table of record batches; column types inferred
+    differently per batch (ie all NULL batch, numeric precision)
+    are promoted to a common type.
+
+    Args:
+        batches (Iterable[pa.RecordBatch]): at least one batch
+
+    Returns:
+        pa.Table: table
+    """
+    tables = [pa.Table.from_batches([batch]) for batch in batches]
+    return pa.concat_tables(tables, promote_options="permissive")
+
+
+# File extensions used to infer compression of a file
+compression_ext: dict = {".gz": "gzip", ".zst": "zstd"}
+
+
+@contextmanager
+def open_writer(file, compression: str | None = "infer"):
+    """Open file path (or wrap file-like object) for writing bytes,
+    compressing on the fly. File-like objects are not closed on exit.
+
+    Args:
+        file (str | PathLike | file-like): file path or object with write()
+        compression (str | None, optional): "gzip", "zstd", None or "infer"
+        from file extension (.gz, .zst). Defaults to "infer".
+
+    Yields:
+        file-like: object to write data to
+    """
+    is_path = not hasattr(file, "write")
+
+    if compression == "infer":
+        name = os.fspath(file) if is_path else getattr(file, "name", "")
+        compression = compression_ext.get(os.path.splitext(str(name))[1])
+
+    if compression not in (None, "gzip", "zstd"):
+        raise ValueError(
+            f"Unsupported compression '{compression}', use 'gzip', 'zstd' or None."
+        )
+
+    if compression == "zstd" and zstandard is None:
+        raise ImportError(
+            "compression='zstd' requires zstandard, pip install zstandard"
+        )
+
+    raw = open(file, "wb") if is_path else file
+    try:
+        if compression == "gzip":
+            writer = gzip.GzipFile(fileobj=raw, mode="wb")
+        elif compression == "zstd":
+            writer = zstandard.ZstdCompressor().stream_writer(raw, closefd=False)
+        else:
+            writer = raw
+
+        try:
+            yield writer
+        finally:
+            # Flush compressed trailer; raw file is left open
+            if writer is not raw:
+                writer.close()
+    finally:
+        if is_path:
+            raw.close()
+
+
+def transform_groups(
+    data_structure, positional: bool = False, ordered: bool = False
+) -> list[tuple[tuple, Iterable]]:
+    """Checks passed data structure, see data_transform(), and returns
+    rows grouped by columns; one query is run per group. List/tuple of
+    dictionaries is validated & grouped in a single pass, see scan_rows().
+
+    Args:
+        data_structure (Any): dataframe, list/tuple of dict or dict
+        positional (bool, optional): return dataframe rows as tuples. Defaults to False.
+        ordered (bool, optional): group consecutive rows of same keys only,
+        see scan_rows(). Defaults to False.
+
+    Returns:
+        list[tuple]: [(columns, rows), ...] one item per unique set of keys
+    """
+
+    if isinstance(data_structure, (list, tuple)):
+        return scan_rows(data_structure, ordered=ordered)
+
+    columns, rows, _ = data_transform(data_structure, positional=positional)
+    return [(columns, rows)]
+
+
 def iterable_difference(minuend: Iterable, subtrahend: Iterable) -> tuple:
     """Used to get the difference between two iterables or sequences.
     ie minuend - subtrahend = difference
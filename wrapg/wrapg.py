@@ -1,9 +1,17 @@
+import io
 import os
-from collections.abc import Iterable
+import glob
+import time
+import uuid
+import threading
+import warnings
+from contextlib import ExitStack, nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from collections.abc import Iterable, Callable
 import psycopg
 from psycopg import sql, errors
 import pandas as pd
-from wrapg import util, snippet
+from wrapg import util, snippet, pool, catalog
 
 
 # ===========================================================================
@@ -27,14 +35,380 @@ conn_import: dict = {
     "port": os.environ.get("port"),
 }
 
+# insert/upsert(method="auto") use postgres COPY when uniform rows >= copy_threshold;
+# opt-in, COPY does not cast values ie NaN filled int column floats 4.0 -> int
+copy_threshold: int = 10_000
+
+# Default # of rows consumed per chunk from iterators/generators
+stream_batch_size: int = 10_000
+
+
+class UpsertCount(int):
+    """# of upserted records, returned by upsert() cte & merge engines;
+    behaves as int, .updated & .inserted give # of each.
+    """
+
+    def __new__(cls, updated: int = 0, inserted: int = 0):
+        count = super().__new__(cls, updated + inserted)
+        count.updated = updated
+        count.inserted = inserted
+        return count
+
+    def __repr__(self):
+        return f"UpsertCount(updated={self.updated}, inserted={self.inserted})"
+
+
+def _sum_counts(counts: Iterable[int]) -> int:
+    """Return sum of counts of chunks/batches; UpsertCount if every
+    count is one (upsert cte/merge engines), else int.
+    """
+    counts = list(counts)
+    if counts and all(isinstance(count, UpsertCount) for count in counts):
+        return UpsertCount(
+            updated=sum(count.updated for count in counts),
+            inserted=sum(count.inserted for count in counts),
+        )
+    return sum(counts)
+
+
 # TODO: implement executemany for params inside query func
 # params: tuple | dict | Iterable[tuple | dict] = None,
 
 
+# ================================= Copy Helper ================================
+def _copy_values(
+    cur: psycopg.Cursor,
+    table: str,
+    columns: tuple,
+    values: Iterable[tuple],
+    binary: bool = False,
+    types: list = None,
+) -> int:
+    """Stream rows (tuples of values in column order) into table
+    using postgres COPY; None values are copied as NULL.
+
+    Args:
+        cur (psycopg.Cursor): cursor of open connection
+        table (str): name of database table
+        columns (tuple): column names, in order of values
+        values (Iterable[tuple]): rows of data
+        binary (bool, optional): use binary copy format. Defaults to False.
+        types (list, optional): type oid per column for binary format.
+        Defaults to None, read from cached table schema (catalog).
+
+    Returns:
+        int: # of copied records
+    """
+
+    if binary and types is None:
+        # Binary format needs postgres type of each column, one dumper
+        # per column instead of per value type; schema cached by catalog
+        types = catalog.column_types(cur.connection, table=table, columns=columns)
+
+    copy_sql = snippet.copy_snip(table=table, columns=columns, binary=binary)
+
+    with cur.copy(copy_sql) as copy:
+        if binary:
+            copy.set_types(types)
+
+        for row in values:
+            copy.write_row(row)
+
+    # Cursor rowcount set by postgres COPY command
+    return cur.rowcount
+
+
+def _copy_rows(
+    cur: psycopg.Cursor,
+    table: str,
+    columns: tuple,
+    rows: Iterable[dict],
+    binary: bool = False,
+    types: list = None,
+) -> int:
+    """Stream rows (dictionaries) into table using postgres COPY.
+
+    Args:
+        cur (psycopg.Cursor): cursor of open connection
+        table (str): name of database table
+        columns (tuple): column names, every row must have these keys
+        rows (Iterable[dict] | Iterable[tuple]): rows of data
+        binary (bool, optional): use binary copy format. Defaults to False.
+        types (list, optional): type oid per column. Defaults to None, read from
+        cached table schema (catalog).
+
+    Returns:
+        int: # of copied records
+    """
+
+    # NaN/NaT/NA values copied as NULL; tuple rows (positional)
+    # are already in column order with None for missing values
+    values = (
+        row if isinstance(row, tuple) else util.copy_values(row, columns)
+        for row in rows
+    )
+
+    # NaN filled int columns of dataframes are float (4.0), COPY does not
+    # cast like INSERT; integral floats of integer columns sent as int
+    if types is None:
+        types = catalog.column_types(cur.connection, table=table, columns=columns)
+    values = util.integral_values(values, types=types)
+
+    return _copy_values(
+        cur, table=table, columns=columns, values=values, binary=binary, types=types
+    )
+
+
+def _copy_arrow(
+    cur: psycopg.Cursor,
+    table: str,
+    data,
+    binary: bool = False,
+    chunk_size: int = 100_000,
+    types: list = None,
+) -> int:
+    """Stream pyarrow Table/RecordBatch or polars DataFrame into table
+    using postgres COPY, one record batch of chunk_size rows at a time.
+    Text format is written as csv by arrow from column buffers, no
+    pandas or python object per value; binary format from column lists.
+
+    Args:
+        cur (psycopg.Cursor): cursor of open connection
+        table (str): name of database table
+        data (pa.Table | pa.RecordBatch | polars.DataFrame): data, columns must
+        match table column names
+        binary (bool, optional): use binary copy format. Defaults to False.
+        chunk_size (int, optional): max # of rows serialized at a time. Defaults to 100_000.
+        types (list, optional): type oid per column. Defaults to None, read from
+        cached table schema (catalog).
+
+    Returns:
+        int: # of copied records
+    """
+
+    data = util.arrow_table(data)
+    columns = tuple(data.column_names)
+
+    if binary:
+        values = util.arrow_values(data, chunk_size=chunk_size)
+        return _copy_values(
+            cur, table=table, columns=columns, values=values, binary=True, types=types
+        )
+
+    # Arrow csv writes nulls as unquoted empty values, strings always quoted
+    copy_sql = snippet.copy_csv_snip(table=table, columns=columns, null="")
+
+    with cur.copy(copy_sql) as copy:
+        for block in util.arrow_csv(data, chunk_size=chunk_size):
+            copy.write(block)
+
+    # Cursor rowcount set by postgres COPY command
+    return cur.rowcount
+
+
+def _copy_frame(
+    cur: psycopg.Cursor,
+    table: str,
+    df: pd.DataFrame,
+    binary: bool = False,
+    chunk_size: int = 100_000,
+    types: list = None,
+) -> int:
+    """Stream dataframe into table using postgres COPY, chunk_size
+    rows at a time; no dictionaries or full copy of dataframe are made.
+    Text format is written as csv by pandas, binary format from
+    column arrays. Arrow/polars data is copied by _copy_arrow().
+
+    Args:
+        cur (psycopg.Cursor): cursor of open connection
+        table (str): name of database table
+        df (pd.DataFrame): data, columns must match table column names
+        binary (bool, optional): use binary copy format. Defaults to False.
+        chunk_size (int, optional): # of rows serialized at a time. Defaults to 100_000.
+        types (list, optional): type oid per column. Defaults to None, read from
+        cached table schema (catalog).
+
+    Returns:
+        int: # of copied records
+    """
+
+    if util.is_arrow(df):
+        return _copy_arrow(
+            cur, table=table, data=df, binary=binary, chunk_size=chunk_size, types=types
+        )
+
+    columns = tuple(df.columns)
+
+    # NaN filled int columns are float (4.0); cast to Int64 for integer
+    # table columns, both formats write 4
+    if types is None:
+        types = catalog.column_types(cur.connection, table=table, columns=columns)
+    df = util.integral_floats(df, types=types)
+
+    if binary:
+        values = util.frame_values(df, chunk_size=chunk_size)
+        return _copy_values(
+            cur, table=table, columns=columns, values=values, binary=True, types=types
+        )
+
+    copy_sql = snippet.copy_csv_snip(table=table, columns=columns)
+
+    with cur.copy(copy_sql) as copy:
+        # One csv block per chunk; NaN/NaT/NA written as \N (NULL)
+        for start in range(0, len(df), chunk_size):
+            chunk = df.iloc[start : start + chunk_size]
+            copy.write(chunk.to_csv(header=False, index=False, na_rep="\\N"))
+
+    # Cursor rowcount set by postgres COPY command
+    return cur.rowcount
+
+
+def _stage_rows(
+    cur: psycopg.Cursor,
+    table: str,
+    columns: tuple,
+    rows: Iterable[dict],
+    binary: bool = False,
+) -> str:
+    """Copy rows into new temporary staging table with same column
+    types as table. Caller must drop staging table when done.
+
+    Args:
+        cur (psycopg.Cursor): cursor of open connection
+        table (str): name of database table staging is based on
+        columns (tuple): column names, every row must have these keys
+        rows (Iterable[dict]): rows of data
+        binary (bool, optional): use binary copy format. Defaults to False.
+
+    Returns:
+        str: name of staging table
+    """
+
+    # Unique name, temp tables only visible to this connection
+    staging = f"wrapg_stage_{uuid.uuid4().hex}"
+
+    cur.execute(
+        query=snippet.staging_table_snip(staging=staging, table=table, columns=columns)
+    )
+
+    # Staging has column types of table; use cached schema of table,
+    # temp staging table is never looked up in catalog
+    types = catalog.column_types(cur.connection, table=table, columns=columns)
+
+    # Arrow table (upsert of arrow/polars data) copied from column buffers
+    if util.is_arrow(rows):
+        _copy_frame(cur=cur, table=staging, df=rows, binary=binary, types=types)
+    else:
+        _copy_rows(
+            cur=cur,
+            table=staging,
+            columns=columns,
+            rows=rows,
+            binary=binary,
+            types=types,
+        )
+
+    return staging
+
+
+def _write_chunked(
+    func: Callable,
+    data,
+    batch_size: int | None,
+    commit_every: int | None,
+    progress: Callable | None,
+    resume_from: int,
+    conn_kwargs: dict | None,
+    **kwargs,
+) -> int:
+    """Run write function (insert/upsert/update) on batches of batch_size
+    rows; batches are committed together every commit_every rows, each
+    commit group in its own transaction (Session). Inside an active session
+    batches join the session transaction and nothing is committed.
+
+    Args:
+        func (Callable): insert, upsert or update
+        data (Any): data accepted by func
+        batch_size (int | None): # of rows per batch, None for commit_every rows
+        (iterators default to stream_batch_size)
+        commit_every (int | None): # of rows per transaction, None for one transaction
+        (iterators default to batch_size, each batch commits)
+        progress (Callable | None): called after each batch with dict of batches,
+        rows, committed, seconds & rows_per_sec; rows counts include resume_from
+        resume_from (int): # of leading rows skipped, ie 'committed' of last progress
+        conn_kwargs (dict | None): connection kwargs passed to func
+        **kwargs: other arguments of func, ie table, keys
+
+    Returns:
+        int: sum of counts returned per batch; UpsertCount for upsert cte/merge engines
+    """
+    # Session imports wrapg, import here to avoid circular import
+    from wrapg.session import Session
+
+    # Iterators are consumed in batches, each batch commits (as before)
+    if util.is_stream(data):
+        batch_size = batch_size or stream_batch_size
+        commit_every = commit_every or batch_size
+    # Commit boundaries fall on batch boundaries
+    batch_size = batch_size or commit_every
+
+    # Batches join active session on same connection; commits on its exit
+    session = pool.active_session.get()
+    conn_params = {k: v for k, v in (conn_kwargs or {}).items() if k != "row_factory"}
+    in_session = session is not None and session.key == pool.pool_key(
+        {**conn_import, **conn_params}
+    )
+
+    stats = {"batches": 0, "rows": resume_from, "committed": resume_from}
+    start = time.perf_counter()
+    counts = []
+
+    def report():
+        if progress is None:
+            return
+        seconds = time.perf_counter() - start
+        rows_per_sec = (stats["rows"] - resume_from) / seconds if seconds else 0.0
+        progress({**stats, "seconds": seconds, "rows_per_sec": rows_per_sec})
+
+    batches = util.batches(data, batch_size, skip=resume_from)
+    batch = next(batches, None)
+
+    # On error current group is rolled back, earlier groups stay committed;
+    # last progress 'committed' is resume_from to retry
+    while batch is not None:
+        pending = 0
+
+        # One transaction per commit group
+        with nullcontext() if in_session else Session(conn_kwargs=conn_kwargs):
+            while batch is not None:
+                counts.append(func(data=batch, conn_kwargs=conn_kwargs, **kwargs))
+
+                n_rows = util.row_count(batch)
+                pending += n_rows
+                stats["rows"] += n_rows
+                stats["batches"] += 1
+
+                batch = next(batches, None)
+
+                # Last batch of group reported after commit
+                if batch is None or (commit_every and pending >= commit_every):
+                    break
+                report()
+
+        if not in_session:
+            stats["committed"] += pending
+        report()
+
+    return _sum_counts(counts)
+
+
 def query(
     raw_sql: str,
     params: tuple | dict = None,
     to_df: bool = False,
+    stream: bool = False,
+    itersize: int = 2_000,
+    to_arrow: bool = False,
     conn_kwargs: dict = None,
 ):
     """Function to send raw sql query to postgres db.
@@ -42,15 +416,30 @@ def query(
     Args:
         raw_sql (str): sql query in string form. named (%(name)s) or un-named (%s) placeholders are allowed.
         params (tuple | dict) : data for named or un-named placeholders
-        to_df (bool, optional): Return results of query in dataframe. Defaults to False.
+        to_df (bool, optional): Return results of query in dataframe; column dtypes follow
+        postgres types (nullable ints, bool, datetime; numeric stays Decimal). Defaults to False.
+        stream (bool, optional): Fetch rows lazily from a server side cursor, itersize rows
+        at a time; memory stays constant for any size of result. Connection is held until
+        iterator is exhausted or closed. Only for queries returning rows (SELECT/VALUES).
+        With to_df=True an iterator of dataframes (itersize rows each) is returned. Defaults to False.
+        itersize (int, optional): # of rows fetched per round trip when stream=True, # of
+        rows per record batch when to_arrow=True. Defaults to 2_000.
+        to_arrow (bool, optional): Return results of query as pyarrow Table, built one
+        record batch of itersize rows at a time with arrow types from postgres types.
+        With stream=True an iterator of pyarrow RecordBatch is returned. Requires
+        pyarrow. Defaults to False.
         conn_kwargs (dict, optional): Specify/overide conn kwargs. See full list of options,
         https://www.postgresql.org/docs/current/libpq-connect.html#LIBPQ-PARAMKEYWORDS.
         Defaults to None, recommend importing via .env file.
 
     Returns:
-        _type_: Iterator[dict] or Dataframe
+        _type_: Iterator[dict], Dataframe or pyarrow Table (Iterator[Dataframe] or
+        Iterator[RecordBatch] if stream)
     """
 
+    if to_df and to_arrow:
+        raise ValueError("Use either to_df or to_arrow, not both.")
+
     # Initialize conn_kwargs to empty dict if no arguments passed
     # Merge args into conn_final
     if conn_kwargs is None:
@@ -60,10 +449,29 @@ def query(
     # Set default return type (row factory) to dictionary, can be overwritten with kwargs
     conn_final = {"row_factory": psycopg.rows.dict_row, **conn_import, **conn_kwargs}
 
+    # Row factory is set on cursor, pooled connections are shared by all functions
+    row_factory = conn_final.pop("row_factory")
+
+    # Dataframes/arrow are built column wise from tuples, cheaper than dict rows
+    if to_df is True or to_arrow is True:
+        row_factory = psycopg.rows.tuple_row
+
+    if stream is True:
+        # Generator, query runs on first next()
+        return _stream_query(
+            raw_sql=raw_sql,
+            params=params,
+            to_df=to_df,
+            to_arrow=to_arrow,
+            itersize=itersize,
+            row_factory=row_factory,
+            conn_final=conn_final,
+        )
+
     # Connect to an existing database
-    with psycopg.connect(**conn_final) as conn:
+    with pool.connection(conn_final) as conn:
         # Open a cursor to perform database operations
-        with conn.cursor() as cur:
+        with conn.cursor(row_factory=row_factory) as cur:
 
             # Pass raw_sql to execute()
             # example: cur.execute("SELECT * FROM tablename WHERE id = 4")
@@ -78,22 +486,268 @@ def query(
             # If 'select' in status message return records as df or iter
             if "SELECT" in cur.statusmessage:
                 if to_df is True:
-                    return pd.DataFrame(cur, dtype="object")
+                    return util.rows_to_df(cur.fetchall(), cur.description)
+
+                if to_arrow is True:
+                    # Python objects only held for one batch at a time
+                    batches = []
+                    while rows := cur.fetchmany(itersize):
+                        batches.append(util.rows_to_arrow(rows, cur.description))
+
+                    # Empty result still gets its columns
+                    if not batches:
+                        batches.append(util.rows_to_arrow([], cur.description))
+                    return util.batches_to_table(batches)
 
                 # Save memory return iterator
                 return iter(cur.fetchall())
 
 
+def _stream_query(
+    raw_sql: str,
+    params: tuple | dict,
+    to_df: bool,
+    itersize: int,
+    row_factory,
+    conn_final: dict,
+    to_arrow: bool = False,
+):
+    """Generator yielding rows (or dataframes/arrow record batches of
+    itersize rows) of query from a named server side cursor.
+    See query(stream=True).
+    """
+
+    # Connect to an existing database, held until generator is closed
+    with pool.connection(conn_final) as conn:
+        # Named cursor, rows stay on server until fetched
+        cursor_name = f"wrapg_stream_{uuid.uuid4().hex}"
+        with conn.cursor(name=cursor_name, row_factory=row_factory) as cur:
+            cur.itersize = itersize
+            cur.execute(query=raw_sql, params=params)
+
+            if to_df is True:
+                while rows := cur.fetchmany(itersize):
+                    yield util.rows_to_df(rows, cur.description)
+                return
+
+            if to_arrow is True:
+                while rows := cur.fetchmany(itersize):
+                    yield util.rows_to_arrow(rows, cur.description)
+                return
+
+            # Fetches itersize rows per round trip
+            yield from cur
+
+
+def _insert_data(
+    conn: psycopg.Connection,
+    data: Iterable[dict] | pd.DataFrame,
+    table: str,
+    method: str = "executemany",
+    binary: bool = False,
+) -> int:
+    """Insert data on open connection, see insert(); changes
+    are committed by caller.
+
+    Returns:
+        int: # of inserted records
+    """
+
+    # Open a cursor to perform database operations
+    with conn.cursor() as cur:
+
+        # Dataframes (pandas, arrow, polars) are copied straight from
+        # column arrays, see copy_from_dataframe()
+        if util.is_frame(data) and (
+            method == "copy" or (method == "auto" and len(data) >= copy_threshold)
+        ):
+            return _copy_frame(cur=cur, table=table, df=data, binary=binary)
+
+        # Dataframe rows as tuples for un-named placeholders, no dict per row
+        positional = util.is_frame(data)
+        # Non uniform data is grouped by columns, one query per group
+        groups = util.transform_groups(data, positional=positional)
+
+        if method == "auto":
+            n_rows = sum(len(grp_rows) for _, grp_rows in groups)
+            method = "copy" if n_rows >= copy_threshold else "executemany"
+
+        # Typ insert statement format
+        # INSERT INTO table (col1, col2) VALUES (300, "vehicles");
+
+        rw_count = 0
+        for grp_columns, grp_rows in groups:
+
+            if method == "copy":
+                # Stream all rows thru COPY, NaN values copied as NULL
+                rw_count += _copy_rows(
+                    cur=cur,
+                    table=table,
+                    columns=grp_columns,
+                    rows=grp_rows,
+                    binary=binary,
+                )
+                continue
+
+            # Dynamic insert query for dictionaries
+            insert_qry = snippet.render_snip(
+                conn,
+                "insert",
+                table=table,
+                columns=grp_columns,
+                positional=positional,
+            )
+            # print(insert_qry.decode())
+
+            # One insert for all dictionaries in group
+            # executemany() sends statements in pipeline mode (batched)
+            cur.executemany(query=insert_qry, params_seq=grp_rows)
+            rw_count += cur.rowcount
+
+        # Return # of inserted records
+        return rw_count
+
+
+def _insert_parallel(
+    parts: list,
+    table: str,
+    method: str,
+    binary: bool,
+    atomic: bool,
+    conn_final: dict,
+) -> int:
+    """Insert each part of data on its own pooled connection from a
+    pool of threads. Parts commit on their own, or if atomic all parts
+    are prepared (two-phase commit) then committed together.
+
+    Returns:
+        int: # of inserted records
+    """
+
+    def insert_part(part) -> int:
+        with pool.connection(conn_final) as conn:
+            return _insert_data(conn, part, table, method=method, binary=binary)
+
+    if not atomic:
+        with ThreadPoolExecutor(
+            max_workers=len(parts), thread_name_prefix="wrapg-insert"
+        ) as executor:
+            # First error is raised, other parts may already be committed
+            return sum(executor.map(insert_part, parts))
+
+    # Global transaction id shared by all parts, branch id per part
+    gtrid = f"wrapg_{uuid.uuid4().hex}"
+
+    # Xid of parts prepared on server, by branch
+    prepared = {}
+
+    def prepare_part(conn, branch: int, part) -> int:
+        xid = conn.xid(format_id=1, gtrid=gtrid, bqual=str(branch))
+        conn.tpc_begin(xid)
+        count = _insert_data(conn, part, table, method=method, binary=binary)
+        # Changes persisted on server, not visible until tpc_commit()
+        conn.tpc_prepare()
+        prepared[branch] = xid
+        return count
+
+    with ExitStack() as stack:
+        # Connections held until every part is committed or rolled back
+        conns = [stack.enter_context(pool.checkout(conn_final)) for _ in parts]
+
+        with ThreadPoolExecutor(
+            max_workers=len(parts), thread_name_prefix="wrapg-insert"
+        ) as executor:
+            futures = [
+                executor.submit(prepare_part, conn, branch, part)
+                for branch, (conn, part) in enumerate(zip(conns, parts))
+            ]
+        # Executor waits for all parts before exit
+
+        failed = [f.exception() for f in futures if f.exception() is not None]
+        if failed:
+            # All or nothing; rolls back prepared & unprepared parts
+            orphaned = []
+            for branch, conn in enumerate(conns):
+                try:
+                    conn.tpc_rollback()
+                except psycopg.Error as e:
+                    # Prepared part left on server holds its locks until
+                    # rolled back; unprepared parts end with the connection
+                    if branch in prepared:
+                        orphaned.append(f"{prepared[branch]} ({e})")
+            if orphaned:
+                warnings.warn(
+                    "Rollback of prepared transaction(s) failed, run "
+                    f"ROLLBACK PREPARED '<xid>' for: {', '.join(orphaned)}",
+                    RuntimeWarning,
+                )
+            raise failed[0]
+
+        # Every part is prepared; commit the others even if one fails,
+        # a failed part stays prepared (holding locks) until resolved
+        orphaned = []
+        for branch, conn in enumerate(conns):
+            try:
+                conn.tpc_commit()
+            except psycopg.Error as e:
+                orphaned.append((prepared[branch], e))
+        if orphaned:
+            warnings.warn(
+                "Commit of prepared transaction(s) failed, run COMMIT PREPARED "
+                "'<xid>' (listed by tpc_recover()) for: "
+                + ", ".join(f"{xid} ({e})" for xid, e in orphaned),
+                RuntimeWarning,
+            )
+            raise orphaned[0][1]
+
+        return sum(f.result() for f in futures)
+
+
 def insert(
-    data: Iterable[dict] | pd.DataFrame, table: str, conn_kwargs: dict = None
+    data: Iterable[dict] | pd.DataFrame,
+    table: str,
+    method: str = "executemany",
+    binary: bool = False,
+    batch_size: int = None,
+    workers: int = 1,
+    atomic: bool = False,
+    commit_every: int = None,
+    progress: Callable = None,
+    resume_from: int = 0,
+    conn_kwargs: dict = None,
 ) -> int:
     """Function for SQL's INSERT
 
     Add a row(s) into specified table
 
     Args:
-        data (Iterable[dict] | pd.DataFrame): data in form of dict, list of dict, or dataframe
+        data (Iterable[dict] | pd.DataFrame): data in form of dict, list of dict, dataframe
+        or any iterable/generator of dict. Iterators are consumed in chunks of batch_size
+        rows, each chunk runs (and commits, unless in a session) on its own.
         table (str): name of database table
+        method (str, optional): "executemany" runs INSERT statements, "copy" streams
+        rows with postgres COPY (much faster for bulk loads), "auto" uses copy when
+        rows >= copy_threshold. Non-uniform data is grouped by columns, one
+        executemany/COPY per group. Defaults to "executemany".
+        binary (bool, optional): use binary COPY format. Defaults to False.
+        batch_size (int, optional): # of rows per chunk; each chunk runs its own
+        executemany/COPY. Defaults to None, whole data (iterators use
+        wrapg.wrapg.stream_batch_size, 10_000).
+        commit_every (int, optional): # of rows per transaction; batches of batch_size rows
+        (default commit_every) are committed together, a failure only rolls back the
+        current group. Inside a session nothing is committed. Defaults to None, one
+        transaction (iterators commit every batch).
+        progress (Callable, optional): called after each batch with dict of batches, rows,
+        committed, seconds & rows_per_sec. Defaults to None.
+        resume_from (int, optional): # of leading rows to skip, ie 'committed' of last
+        progress call of a failed run. Defaults to 0.
+        workers (int, optional): Split data into 'workers' slices, each inserted on its own
+        pooled connection from a pool of threads; capped to pool max_size. Ignored inside
+        a session; can not be combined with commit_every, progress, resume_from or
+        batch_size (except for iterators). Defaults to 1.
+        atomic (bool, optional): With workers > 1, commit all slices or none using
+        two-phase commit; server needs max_prepared_transactions >= workers. If False
+        each slice commits on its own. Defaults to False.
         conn_kwargs (dict, optional): Specify/overide conn kwargs. See full list of options,
         https://www.postgresql.org/docs/current/libpq-connect.html#LIBPQ-PARAMKEYWORDS.
         Defaults to None, recommend importing via .env file.
@@ -102,7 +756,54 @@ def insert(
         int: # of inserted records
     """
 
-    columns, rows, uniform = util.data_transform(data)
+    if method not in ("auto", "executemany", "copy"):
+        raise ValueError(
+            f"Unsupported method '{method}', use auto, executemany or copy."
+        )
+
+    # Batches executed & committed in chunks, see _write_chunked()
+    if (
+        commit_every is not None
+        or progress is not None
+        or resume_from
+        or (batch_size is not None and not util.is_stream(data))
+    ):
+        # Batches run in order, one transaction per commit group
+        if workers > 1:
+            raise ValueError(
+                "workers > 1 can not be combined with commit_every, progress, "
+                "resume_from or batch_size (except for iterators)."
+            )
+
+        return _write_chunked(
+            insert,
+            data=data,
+            batch_size=batch_size,
+            commit_every=commit_every,
+            progress=progress,
+            resume_from=resume_from,
+            conn_kwargs=conn_kwargs,
+            table=table,
+            method=method,
+            binary=binary,
+            workers=workers,
+            atomic=atomic,
+        )
+
+    # Iterator/generator; insert one chunk at a time, memory stays bounded
+    if util.is_stream(data):
+        return sum(
+            insert(
+                data=chunk,
+                table=table,
+                method=method,
+                binary=binary,
+                workers=workers,
+                atomic=atomic,
+                conn_kwargs=conn_kwargs,
+            )
+            for chunk in util.chunked(data, batch_size or stream_batch_size)
+        )
 
     # Initialize conn_kwargs to empty dict if no arguments passed
     # Merge args into conn_final
@@ -112,42 +813,90 @@ def insert(
     # Final conn args to pass to connect()
     conn_final = {**conn_import, **conn_kwargs}
 
+    # Session runs on its one connection
+    if pool.active_session.get() is not None:
+        workers = 1
+    # Workers beyond pool size would wait on a connection
+    elif pool.use_pool:
+        workers = min(workers, pool.pool_config["max_size"])
+
+    parts = util.partition(data, workers)
+    if len(parts) > 1:
+        # Same method for every slice, decided on all rows
+        if method == "auto":
+            method = "copy" if len(data) >= copy_threshold else "executemany"
+
+        return _insert_parallel(
+            parts,
+            table=table,
+            method=method,
+            binary=binary,
+            atomic=atomic,
+            conn_final=conn_final,
+        )
+
     # Connect to an existing database
-    with psycopg.connect(**conn_final) as conn:
-        # Open a cursor to perform database operations
-        with conn.cursor() as cur:
-            # Typ insert statement format
-            # INSERT INTO table (col1, col2) VALUES (300, "vehicles");
+    with pool.connection(conn_final) as conn:
+        return _insert_data(conn, data, table, method=method, binary=binary)
 
-            if uniform == 1:
-                # Dynamic insert query for dictionaries
-                insert_qry = snippet.insert_snip(table=table, columns=columns)
-                # print(insert_qry.as_string(conn))
 
-                # One insert for all dictionaries
-                cur.executemany(query=insert_qry, params_seq=rows)
+def copy_from_dataframe(
+    df,
+    table: str,
+    binary: bool = False,
+    chunk_size: int = 100_000,
+    conn_kwargs: dict = None,
+) -> int:
+    """Copy dataframe to table using postgres copy protocol.
 
-                # Return # of inserted records
-                return cur.rowcount
+    Rows are serialized chunk_size at a time from the dataframe
+    columns; peak memory stays near size of dataframe. NaN/NaT/NA
+    values are copied as NULL. In text format (default) a string
+    value of '\\N' is also read as NULL, use binary=True if needed.
 
-            else:
-                rw_count = 0
-                # For non uniform data
-                for row in rows:
-                    # Dynamic insert query for dictionaries
-                    insert_qry = snippet.insert_snip(table=table, columns=tuple(row))
+    pyarrow Table/RecordBatch & polars DataFrame are written as csv by
+    arrow straight from column buffers (nulls copied as NULL, float NaN
+    kept as NaN); requires pyarrow.
 
-                    # Seperate insert for each dictionary
-                    cur.execute(query=insert_qry, params=row)
-                    rw_count += cur.rowcount
+    Args:
+        df (pd.DataFrame | pa.Table | pa.RecordBatch | polars.DataFrame): data,
+        column names must match table columns
+        table (str): name of database table
+        binary (bool, optional): use binary COPY format. Defaults to False.
+        chunk_size (int, optional): # of rows serialized at a time. Defaults to 100_000.
+        conn_kwargs (dict, optional): Specify/overide conn kwargs. See full list of options,
+        https://www.postgresql.org/docs/current/libpq-connect.html#LIBPQ-PARAMKEYWORDS.
+        Defaults to None, recommend importing via .env file.
 
-                return rw_count
+    Example:
+        copy_from_dataframe(df=heroes_df, table="heroes")
+
+    Returns:
+        int: # of copied records
+    """
+
+    # Initialize conn_kwargs to empty dict if no arguments passed
+    # Merge args into conn_final
+    if conn_kwargs is None:
+        conn_kwargs = {}
+
+    # Final conn args to pass to connect()
+    conn_final = {**conn_import, **conn_kwargs}
+
+    # Connect to an existing database
+    with pool.connection(conn_final) as conn:
+        # Open a cursor to perform database operations
+        with conn.cursor() as cur:
+            return _copy_frame(
+                cur=cur, table=table, df=df, binary=binary, chunk_size=chunk_size
+            )
 
 
 def insert_ignore(
     data: Iterable[dict] | pd.DataFrame,
     table: str,
     keys: Iterable,
+    batch_size: int = None,
     conn_kwargs: dict = None,
 ):
     """Function for SQL's INSERT ON CONFLICT DO NOTHING
@@ -157,16 +906,32 @@ def insert_ignore(
     Automatically creates unique index if one does not exist for keys provided.
 
     Args:
-        data (Iterable[dict] | pd.DataFrame): data in form of dict, list of dict, or dataframe
+        data (Iterable[dict] | pd.DataFrame): data in form of dict, list of dict, dataframe
+        or any iterable/generator of dict. Iterators are consumed in chunks of batch_size
+        rows, each chunk runs (and commits, unless in a session) on its own.
+        Rows with different columns run in order as runs of consecutive rows with same
+        columns, so the first row for a key wins.
         table (str): name of database table
         keys (list): Iterable of columns
+        batch_size (int, optional): # of rows per chunk when data is an iterator.
+        Defaults to None, uses wrapg.wrapg.stream_batch_size (10_000).
         conn_kwargs (dict, optional): Specify/overide conn kwargs. See full list of options,
         https://www.postgresql.org/docs/current/libpq-connect.html#LIBPQ-PARAMKEYWORDS.
         Defaults to None, recommend importing via .env file.
     """
 
+    # Iterator/generator; insert one chunk at a time, memory stays bounded
+    if util.is_stream(data):
+        for chunk in util.chunked(data, batch_size or stream_batch_size):
+            insert_ignore(data=chunk, table=table, keys=keys, conn_kwargs=conn_kwargs)
+        return
+
     # Inspect data and return columns and rows
-    columns, rows, uniform = util.data_transform(data)
+    # Dataframe rows as tuples for un-named placeholders, no dict per row
+    positional = util.is_frame(data)
+    # Non uniform data is grouped by consecutive columns, one query per run;
+    # rows with same key are applied in data order
+    groups = util.transform_groups(data, positional=positional, ordered=True)
 
     # Initialize conn_kwargs to empty dict if no arguments passed
     # Merge args into conn_final
@@ -178,7 +943,7 @@ def insert_ignore(
     conn_final = {**conn_import, **conn_kwargs}
 
     # Connect to an existing database
-    with psycopg.connect(**conn_final) as conn:
+    with pool.connection(conn_final) as conn:
         # Open a cursor to perform database operations
         with conn.cursor() as cur:
             # =================== Ignore_Insert Qry ==================
@@ -187,54 +952,37 @@ def insert_ignore(
             # ON CONFLICT (name)
             # DO NOTHING;
 
-            try:
-                # uniform column names thru data submitted
-                if uniform == 1:
+            def insert_ignore_rows():
+                for grp_columns, grp_rows in groups:
                     # get sql qry based on passed parameters
-                    qry = snippet.insert_ignore_snip(
-                        table=table, columns=columns, keys=keys
+                    qry = snippet.render_snip(
+                        conn,
+                        "insert_ignore",
+                        table=table,
+                        columns=grp_columns,
+                        keys=keys,
+                        positional=positional,
                     )
-                    # print(qry.as_string(conn))
-                    cur.executemany(query=qry, params_seq=rows)
+                    # print(qry.decode())
+                    cur.executemany(query=qry, params_seq=grp_rows)
 
                     # TODO: add return count and test for all cases
                     # return cur.rowcount
 
-                else:
-                    for row in rows:
-                        # get sql qry based on passed parameters for each row
-                        qry = snippet.insert_ignore_snip(
-                            table=table, columns=tuple(row), keys=keys
-                        )
-                        # print(qry.as_string(conn))
-                        cur.execute(query=qry, params=row)
-
-            # Catch no unique constriant error
-            except errors.InvalidColumnReference as e:
-                print(">>> Error: ", e)
-                print("> Rolling back, attempt creation of new constriant...")
-                conn.rollback()
-
+            try:
+                # Savepoint; on error only this attempt is rolled back,
+                # keeps earlier work in a Session intact
+                # Unique index from catalog cache, created up front if missing;
+                # dropped from cache again if savepoint rolls back
+                with conn.transaction(), catalog.unique_index(conn, table, keys):
+                    insert_ignore_rows()
+
+            # Cached index dropped outside wrapg, re-read catalog & try again
+            except errors.InvalidColumnReference:
+                catalog.invalidate(table)
                 try:
-                    # Create new unique index & try insert_ignore again
-                    uix_sql = snippet.create_unique_index(table=table, keys=keys)
-                    # print(uix_sql.as_string(conn))
-                    cur.execute(query=uix_sql)
-
-                    if uniform == 1:
-                        qry = snippet.insert_ignore_snip(
-                            table=table, columns=columns, keys=keys
-                        )
-                        # Now execute previous insert_ignore statement
-                        cur.executemany(query=qry, params_seq=rows)
-
-                    else:
-                        for row in rows:
-                            qry = snippet.insert_ignore_snip(
-                                table=table, columns=tuple(row), keys=keys
-                            )
-                            # print(qry.as_string(conn))
-                            cur.execute(query=qry, params=row)
+                    with conn.transaction(), catalog.unique_index(conn, table, keys):
+                        insert_ignore_rows()
 
                 except Exception as indx_error:
                     print(">>> Error: ", indx_error)
@@ -245,8 +993,7 @@ def insert_ignore(
                 print("Exception: ", ee.__init__)
                 quit()
 
-            # Make the changes to the database persistent
-            conn.commit()
+            # Changes are committed on exit of connection context
 
 
 def upsert(
@@ -255,6 +1002,13 @@ def upsert(
     keys: Iterable,
     exclude_update: Iterable = None,
     use_index: bool = True,
+    method: str = "executemany",
+    binary: bool = False,
+    batch_size: int = None,
+    engine: str = "auto",
+    commit_every: int = None,
+    progress: Callable = None,
+    resume_from: int = 0,
     conn_kwargs: dict = None,
 ) -> int:
     # TODO: should we have auto_index for auto create index & use_index for determing if index should be used?
@@ -265,21 +1019,114 @@ def upsert(
     Automatically creates unique index if one does not exist for keys provided.
 
     Args:
-        data (Iterable[dict] | pd.DataFrame): data in form of dict, list of dict, or dataframe
+        data (Iterable[dict] | pd.DataFrame): data in form of dict, list of dict, dataframe
+        or any iterable/generator of dict. Iterators are consumed in chunks of batch_size
+        rows, each chunk runs (and commits, unless in a session) on its own.
+        Rows with different columns run in order as runs of consecutive rows with same
+        columns, so the last row for a key wins.
         table (str): name of database table
         keys (Iterable): column names used to filter & match records; synonymous with sql WHERE
-        use_index (bool): if False first try to update then insert without use of an index.
+        use_index (bool): if False upsert without use of an index; rows are copied to a
+        staging table then one statement updates matching records & inserts the others.
         exclude_update (Iterable): exclude columns from updating database
+        method (str, optional): "executemany" runs one upsert statement per row, "copy" COPYs
+        rows into a temporary staging table then upserts all rows with one INSERT ... SELECT
+        (much faster for bulk merges), "auto" uses copy when rows >= copy_threshold.
+        Only used by on_conflict engine. Defaults to "executemany".
+        binary (bool, optional): use binary COPY format (staging table & method="copy").
+        Defaults to False.
+        batch_size (int, optional): # of rows per chunk; each chunk runs its own
+        executemany/COPY. Defaults to None, whole data (iterators use
+        wrapg.wrapg.stream_batch_size, 10_000).
+        commit_every (int, optional): # of rows per transaction; batches of batch_size rows
+        (default commit_every) are committed together, a failure only rolls back the
+        current group. Inside a session nothing is committed. Defaults to None, one
+        transaction (iterators commit every batch).
+        progress (Callable, optional): called after each batch with dict of batches, rows,
+        committed, seconds & rows_per_sec. Defaults to None.
+        resume_from (int, optional): # of leading rows to skip, ie 'committed' of last
+        progress call of a failed run. Defaults to 0.
+        engine (str, optional): "on_conflict" INSERT ... ON CONFLICT (unique index),
+        "cte" staging table & UPDATE/INSERT in one WITH statement, "merge" staging
+        table & one MERGE statement (PostgreSQL 15+), "auto" uses on_conflict if
+        use_index=True, else merge on PostgreSQL 15+ or cte. Defaults to "auto".
         conn_kwargs (dict, optional): Specify/overide conn kwargs. See full list of options,
         https://www.postgresql.org/docs/current/libpq-connect.html#LIBPQ-PARAMKEYWORDS.
         Defaults to None, recommend importing via .env file.
 
     Returns:
-        int: # of updated or inserted records
+        int: # of updated or inserted records; UpsertCount (int with .updated &
+        .inserted) for cte & merge engines
     """
 
+    if method not in ("auto", "executemany", "copy"):
+        raise ValueError(
+            f"Unsupported method '{method}', use auto, executemany or copy."
+        )
+
+    if engine not in ("auto", "on_conflict", "cte", "merge"):
+        raise ValueError(
+            f"Unsupported engine '{engine}', use auto, on_conflict, cte or merge."
+        )
+
+    # Batches executed & committed in chunks, see _write_chunked()
+    if (
+        commit_every is not None
+        or progress is not None
+        or resume_from
+        or (batch_size is not None and not util.is_stream(data))
+    ):
+        return _write_chunked(
+            upsert,
+            data=data,
+            batch_size=batch_size,
+            commit_every=commit_every,
+            progress=progress,
+            resume_from=resume_from,
+            conn_kwargs=conn_kwargs,
+            table=table,
+            keys=keys,
+            exclude_update=exclude_update,
+            use_index=use_index,
+            method=method,
+            binary=binary,
+            engine=engine,
+        )
+
+    # Iterator/generator; upsert one chunk at a time, memory stays bounded
+    if util.is_stream(data):
+        return _sum_counts(
+            upsert(
+                data=chunk,
+                table=table,
+                keys=keys,
+                exclude_update=exclude_update,
+                use_index=use_index,
+                method=method,
+                binary=binary,
+                engine=engine,
+                conn_kwargs=conn_kwargs,
+            )
+            for chunk in util.chunked(data, batch_size or stream_batch_size)
+        )
+
     # Inspect data and return columns and rows
-    columns, rows, uniform = util.data_transform(data)
+    # Dataframe rows as tuples for un-named placeholders, no dict per row
+    positional = util.is_frame(data)
+
+    if util.is_arrow(data):
+        # Arrow/polars data is staged straight from column buffers,
+        # see _stage_rows(); tuple rows only built for executemany
+        data = util.arrow_table(data)
+        groups = [(tuple(data.column_names), data)]
+    else:
+        # Non uniform data is grouped by consecutive columns, one query per run;
+        # rows with same key are applied in data order
+        groups = util.transform_groups(data, positional=positional, ordered=True)
+
+    if method == "auto":
+        n_rows = sum(len(grp_rows) for _, grp_rows in groups)
+        method = "copy" if n_rows >= copy_threshold else "executemany"
 
     # Initialize conn_kwargs to empty dict if no arguments passed
     # Merge args into conn_final
@@ -291,7 +1138,21 @@ def upsert(
     conn_final = {**conn_import, **conn_kwargs}
 
     # Connect to an existing database
-    with psycopg.connect(**conn_final) as conn:
+    with pool.connection(conn_final) as conn:
+        # MERGE added in PostgreSQL 15, RETURNING merge_action() in 17
+        server_version = conn.info.server_version
+
+        if engine == "auto":
+            if use_index is True:
+                engine = "on_conflict"
+            else:
+                engine = "merge" if server_version >= 150000 else "cte"
+
+        if engine == "merge" and server_version < 150000:
+            raise ValueError(
+                f"engine 'merge' requires PostgreSQL 15+, server is {server_version}."
+            )
+
         # Open a cursor to perform database operations
         with conn.cursor() as cur:
             # =================== Upsert Qry ==================
@@ -301,78 +1162,73 @@ def upsert(
             # DO UPDATE SET email=excluded.email
             # WHERE ...;
 
-            if use_index is True:
-                try:
-                    # Process uniform data
-                    if uniform == 1:
-                        qry = snippet.upsert_snip(
+            def upsert_rows() -> int:
+                """Upsert all rows, return # of updated or inserted records"""
+
+                rw_count = 0
+                for grp_columns, grp_rows in groups:
+
+                    # Bulk upsert thru staging table
+                    if method == "copy":
+                        # 1. Copy rows into temporary staging table
+                        staging = _stage_rows(
+                            cur=cur,
                             table=table,
-                            columns=columns,
+                            columns=grp_columns,
+                            rows=grp_rows,
+                            binary=binary,
+                        )
+
+                        # 2. One set based upsert from staging table
+                        qry = snippet.upsert_select_snip(
+                            table=table,
+                            staging=staging,
+                            columns=grp_columns,
                             keys=keys,
                             exclude_update=exclude_update,
                         )
                         # print(qry.as_string(conn))
-                        cur.executemany(query=qry, params_seq=rows)
-                        return cur.rowcount
-
-                    # Process Non-Uniform Data
-                    else:
-                        rw_count = 0
-                        for row in rows:
-                            # Note tupe(row) returns column keys for each record
-                            qry = snippet.upsert_snip(
-                                table=table,
-                                columns=tuple(row),
-                                keys=keys,
-                                exclude_update=exclude_update,
-                            )
-                            # print(qry.as_string(conn))
-                            cur.execute(query=qry, params=row)
-                            rw_count += cur.rowcount
-                        return rw_count
-
-                # Catch no unique index error
-                # TODO: Can i check if index exist rather than using error
-                except errors.InvalidColumnReference as e:
-                    # print(">>> Error: ", e)
-                    print(f"> Creating unique index for {keys}...")
-                    # !Important, cannot attempt other operations after error unless rollback()
-                    conn.rollback()
-
-                    # Create unique index & try upsert again
+                        cur.execute(query=qry)
+                        rw_count += cur.rowcount
+
+                        # 3. Drop staging table
+                        cur.execute(query=snippet.drop_table_snip(table=staging))
+                        continue
+
+                    qry = snippet.render_snip(
+                        conn,
+                        "upsert",
+                        table=table,
+                        columns=grp_columns,
+                        keys=keys,
+                        exclude_update=exclude_update,
+                        positional=positional,
+                    )
+                    # print(qry.decode())
+                    if util.is_arrow(grp_rows):
+                        grp_rows = util.arrow_values(grp_rows)
+                    cur.executemany(query=qry, params_seq=grp_rows)
+                    rw_count += cur.rowcount
+
+                return rw_count
+
+            if engine == "on_conflict":
+                try:
+                    # Savepoint; on error only this attempt is rolled back,
+                    # keeps earlier work in a Session intact
+                    # Unique index from catalog cache, created up front if missing;
+                    # dropped from cache again if savepoint rolls back
+                    with conn.transaction(), catalog.unique_index(conn, table, keys):
+                        return upsert_rows()
+
+                # Cached index dropped outside wrapg, re-read catalog & try again
+                except errors.InvalidColumnReference:
+                    catalog.invalidate(table)
                     try:
-                        uix_sql = snippet.create_unique_index(table=table, keys=keys)
-                        # print(uix_sql.as_string(conn))
-                        cur.execute(query=uix_sql)
-
-                        # Process Uniform data
-                        if uniform == 1:
-                            qry = snippet.upsert_snip(
-                                table=table,
-                                columns=columns,
-                                keys=keys,
-                                exclude_update=exclude_update,
-                            )
-                            # print(qry.as_string(conn))
-                            cur.executemany(query=qry, params_seq=rows)
-                            return cur.rowcount
-
-                        # Process Non-uniform data
-                        else:
-                            rw_count = 0
-                            for row in rows:
-                                # Note tupe(row) returns column keys for each record
-                                qry = snippet.upsert_snip(
-                                    table=table,
-                                    columns=tuple(row),
-                                    keys=keys,
-                                    exclude_update=exclude_update,
-                                )
-                                # print(qry.as_string(conn))
-                                cur.execute(query=qry, params=row)
-                                rw_count += cur.rowcount
-
-                            return rw_count
+                        with conn.transaction(), catalog.unique_index(
+                            conn, table, keys
+                        ):
+                            return upsert_rows()
 
                     except Exception as indx_error:
                         print(">>> Error: ", indx_error)
@@ -383,88 +1239,82 @@ def upsert(
                     print("Exception: ", ee.__init__)
                     quit()
 
-            if use_index is False:
-                # If use_index is False
-                # First attempt to update data, confirm result
-                # If no update, then insert record
+            # Set based engines (cte, merge), no unique index required
+            # Rows are copied to staging table, then one statement
+            # updates matching records & inserts the others
+
+            updated = inserted = 0
+            for grp_columns, grp_rows in groups:
+                staging = _stage_rows(
+                    cur=cur,
+                    table=table,
+                    columns=grp_columns,
+                    rows=grp_rows,
+                    binary=binary,
+                )
 
-                # Process uniform data without index
-                if uniform == 1:
-                    # Update qry for uniform data
-                    update_qry = snippet.update_snip(
+                if engine == "cte":
+                    qry = snippet.upsert_noindex_snip(
                         table=table,
-                        columns=columns,
+                        staging=staging,
+                        columns=grp_columns,
                         keys=keys,
                         exclude_update=exclude_update,
                     )
-                    cur.executemany(query=update_qry, params_seq=rows)
-
-                    # if all records updated, finish return # of updated records
-                    if cur.rowcount == len(rows):
-                        # print("All records updated, uniform")
-                        return cur.rowcount
-
-                    # Dynamic insert query for dictionaries
-                    insert_qry = snippet.insert_snip(table=table, columns=columns)
-
-                    # Insert all records (no records can be updated)
-                    if cur.rowcount == 0:
-                        # One insert for all dictionaries
-                        cur.executemany(query=insert_qry, params_seq=rows)
-                        # print("All records inserted, uniform")
-
-                        return cur.rowcount
-
-                    # Update or Insert new records need to be inserted
-                    rw_count = 0
-                    # print("Records updated & inserted, uniform")
-                    for row in rows:
-                        # Update single record
-                        cur.execute(query=update_qry, params=row)
-                        rw_count += cur.rowcount
-
-                        # if no update then insert record
-                        if cur.rowcount == 0:
-                            cur.execute(query=insert_qry, params=row)
-                            rw_count += cur.rowcount
+                    cur.execute(query=qry)
+                    grp_updated, grp_inserted = cur.fetchone()
 
-                    # total records updated or inserted
-                    return rw_count
+                # PostgreSQL 17+, MERGE returns action of each row
+                elif server_version >= 170000:
+                    qry = snippet.upsert_merge_snip(
+                        table=table,
+                        staging=staging,
+                        columns=grp_columns,
+                        keys=keys,
+                        exclude_update=exclude_update,
+                        returning=True,
+                    )
+                    cur.execute(query=qry)
+                    grp_updated, grp_inserted = cur.fetchone()
 
-                # Process Non-uniform data without index
+                # PostgreSQL 15/16, MERGE only reports total rowcount;
+                # count rows without a match first, the rest are updates
                 else:
-                    # print("Records updated & inserted, Non-uniform")
-                    rw_count = 0
-                    for row in rows:
-                        # Update qry for uniform data
-                        update_qry = snippet.update_snip(
-                            table=table,
-                            columns=tuple(row),
-                            keys=keys,
-                            exclude_update=exclude_update,
-                        )
-                        # print(update_qry.as_string(conn))
-                        cur.execute(query=update_qry, params=row)
-                        rw_count += cur.rowcount
+                    qry = snippet.unmatched_count_snip(
+                        table=table, staging=staging, columns=grp_columns, keys=keys
+                    )
+                    cur.execute(query=qry)
+                    (grp_inserted,) = cur.fetchone()
+
+                    qry = snippet.upsert_merge_snip(
+                        table=table,
+                        staging=staging,
+                        columns=grp_columns,
+                        keys=keys,
+                        exclude_update=exclude_update,
+                    )
+                    cur.execute(query=qry)
+                    grp_updated = cur.rowcount - grp_inserted
 
-                        # if no update then insert record
-                        if cur.rowcount == 0:
-                            # Dynamic insert query for dictionaries
-                            insert_qry = snippet.insert_snip(
-                                table=table, columns=tuple(row)
-                            )
-                            cur.execute(query=insert_qry, params=row)
+                updated += grp_updated
+                inserted += grp_inserted
 
-                            rw_count += cur.rowcount
-                    return rw_count
+                cur.execute(query=snippet.drop_table_snip(table=staging))
+
+            # total records updated or inserted
+            return UpsertCount(updated=updated, inserted=inserted)
 
 
 # ================================= UPDATE Function ================================
 def update(
-    data: list[dict] | pd.DataFrame,
+    data: Iterable[dict] | pd.DataFrame,
     table: str,
     keys: Iterable,
     exclude_update: Iterable = None,
+    batch_size: int = None,
+    commit_every: int = None,
+    progress: Callable = None,
+    resume_from: int = 0,
     conn_kwargs: dict = None,
 ) -> int:
     """Function for SQL's UPDATE
@@ -474,10 +1324,25 @@ def update(
     keys parameter must be specified in function.
 
     Args:
-        data (list[dict] | pd.DataFrame): data in form of dict, list of dict, or dataframe
+        data (Iterable[dict] | pd.DataFrame): data in form of dict, list of dict, dataframe
+        or any iterable/generator of dict. Iterators are consumed in chunks of batch_size
+        rows, each chunk runs (and commits, unless in a session) on its own.
+        Rows with different columns run in order as runs of consecutive rows with same
+        columns, so the last row for a key wins.
         table (str): name of database table
         keys (Iterable): column names used to filter & match records; synonymous with sql WHERE
         exclude_update (Iterable): exclude columns from updating database
+        batch_size (int, optional): # of rows per chunk; each chunk runs its own
+        executemany. Defaults to None, whole data (iterators use
+        wrapg.wrapg.stream_batch_size, 10_000).
+        commit_every (int, optional): # of rows per transaction; batches of batch_size rows
+        (default commit_every) are committed together, a failure only rolls back the
+        current group. Inside a session nothing is committed. Defaults to None, one
+        transaction (iterators commit every batch).
+        progress (Callable, optional): called after each batch with dict of batches, rows,
+        committed, seconds & rows_per_sec. Defaults to None.
+        resume_from (int, optional): # of leading rows to skip, ie 'committed' of last
+        progress call of a failed run. Defaults to 0.
         conn_kwargs (dict, optional): Specify/overide conn kwargs. See full list of options,
         https://www.postgresql.org/docs/current/libpq-connect.html#LIBPQ-PARAMKEYWORDS.
         Defaults to None, recommend importing via .env file.
@@ -486,8 +1351,43 @@ def update(
         int: # of updated records
     """
 
+    # Batches executed & committed in chunks, see _write_chunked()
+    if (
+        commit_every is not None
+        or progress is not None
+        or resume_from
+        or (batch_size is not None and not util.is_stream(data))
+    ):
+        return _write_chunked(
+            update,
+            data=data,
+            batch_size=batch_size,
+            commit_every=commit_every,
+            progress=progress,
+            resume_from=resume_from,
+            conn_kwargs=conn_kwargs,
+            table=table,
+            keys=keys,
+            exclude_update=exclude_update,
+        )
+
+    # Iterator/generator; update one chunk at a time, memory stays bounded
+    if util.is_stream(data):
+        return sum(
+            update(
+                data=chunk,
+                table=table,
+                keys=keys,
+                exclude_update=exclude_update,
+                conn_kwargs=conn_kwargs,
+            )
+            for chunk in util.chunked(data, batch_size or stream_batch_size)
+        )
+
     # Inspect data and return columns and rows
-    columns, rows, uniform = util.data_transform(data)
+    # Non uniform data is grouped by consecutive columns, one query per run;
+    # rows with same key are applied in data order
+    groups = util.transform_groups(data, ordered=True)
 
     # Initialize conn_kwargs to empty dict if no arguments passed
     # Merge args into conn_final
@@ -499,7 +1399,7 @@ def update(
     conn_final = {**conn_import, **conn_kwargs}
 
     # Connect to an existing database
-    with psycopg.connect(**conn_final) as conn:
+    with pool.connection(conn_final) as conn:
         # Open a cursor to perform database operations
         with conn.cursor() as cur:
             # =================== Update Qry ===================
@@ -510,37 +1410,23 @@ def update(
             # WHERE column = value, ...
             # RETURNING * | output_expression AS output_name;
 
-            if uniform == 1:
-                # print("> Uniform Data..")
-                qry = snippet.update_snip(
+            rwcount = 0
+            for grp_columns, grp_rows in groups:
+                qry = snippet.render_snip(
+                    conn,
+                    "update",
                     table=table,
-                    columns=columns,
+                    columns=grp_columns,
                     keys=keys,
                     exclude_update=exclude_update,
                 )
-                # print(qry.as_string(conn))
-                cur.executemany(query=qry, params_seq=rows)
-
-                # Return # of updated records
-                return cur.rowcount
+                # print(qry.decode())
+                # executemany() sends statements in pipeline mode (batched)
+                cur.executemany(query=qry, params_seq=grp_rows)
+                rwcount += cur.rowcount
 
-            else:
-                # print(">> Non-Uniform Data...")
-                rwcount = 0
-                for row in rows:
-                    qry = snippet.update_snip(
-                        table=table,
-                        columns=tuple(row),
-                        keys=keys,
-                        exclude_update=exclude_update,
-                    )
-
-                    # print(qry.as_string(conn))
-                    cur.execute(query=qry, params=row)
-                    rwcount += cur.rowcount
-
-                # Return # of updated records
-                return rwcount
+            # Return # of updated records
+            return rwcount
 
 
 def create_table(table: str, columns: dict, conn_kwargs: dict = None):
@@ -571,7 +1457,7 @@ def create_table(table: str, columns: dict, conn_kwargs: dict = None):
     conn_final = {**conn_import, **conn_kwargs}
 
     # Connect to an existing database
-    with psycopg.connect(**conn_final) as conn:
+    with pool.connection(conn_final) as conn:
         # Open a cursor to perform database operations
         with conn.cursor() as cur:
             # TODO: Add optional table constriants to function
@@ -583,35 +1469,15 @@ def create_table(table: str, columns: dict, conn_kwargs: dict = None):
             # table_constraints
             # );
 
-            # Function to compose 'colname datatype constriant' sql str
-            def define_column(column_info: dict):
-                """Create psycopg composable sql string for
-                defining columns within postgres table
-                ie column_name datatype(length) column_constriant
-
-                Args:
-                    column_pairs (Iterable): column names
-                """
-
-                # function used to map to column names
-                def col_sql(col, value):
-                    # return sql.SQL(f'"{col}" {value.upper()}')
-                    return sql.SQL("{} {}").format(
-                        sql.Identifier(col), sql.SQL(value.upper())
-                    )
-
-                return [col_sql(k, v) for k, v in column_info.items()]
-
-            qry = sql.SQL("CREATE TABLE IF NOT EXISTS {} ({});").format(
-                sql.Identifier(table),
-                sql.SQL(", ").join(define_column(columns)),
-            )
+            qry = snippet.create_table_snip(table=table, columns=columns)
             # print(qry.as_string(conn))
 
             cur.execute(query=qry)
 
-            # Make the changes to the database persistent
-            conn.commit()
+            # Table may have been dropped & created again, drop cached metadata
+            catalog.invalidate(table)
+
+            # Changes are committed on exit of connection context
 
 
 def create_database(name: str, conn_kwargs: dict = None):
@@ -641,7 +1507,7 @@ def create_database(name: str, conn_kwargs: dict = None):
     # dbname must equal None for connection string, db does not exist yet
     conn_final = {**conn_import, **conn_kwargs, **{"dbname": None}}
 
-    # Connect to an existing database
+    # Dedicated connection, not pooled; autocommit is changed below
     with psycopg.connect(**conn_final) as conn:
         # required for create database
         conn.autocommit = True
@@ -657,35 +1523,216 @@ def create_database(name: str, conn_kwargs: dict = None):
 
             cur.execute(query=qry)
 
-            # Make the changes to the database persistent
-            conn.commit()
+            # Changes are committed on exit of connection context
+
+
+def _csv_pieces(files: list, header: bool, split: int) -> list[tuple]:
+    """Return pieces of csv files to copy, one (file, start, end, header)
+    per file; file is split at line boundaries into byte ranges if split > 1.
+    Only first piece of a file has the header.
+    """
+
+    pieces = []
+    for file in files:
+        size = os.path.getsize(file)
+
+        # Byte offsets where pieces start, moved forward to next line
+        starts = [0]
+        with open(file, "rb") as f:
+            for i in range(1, max(split, 1)):
+                f.seek(size * i // split)
+                # Partial line belongs to previous piece
+                f.readline()
+                if f.tell() > starts[-1] and f.tell() < size:
+                    starts.append(f.tell())
+
+        ends = starts[1:] + [size]
+        pieces += [
+            (file, start, end, header and start == 0)
+            for start, end in zip(starts, ends)
+        ]
+
+    return pieces
+
+
+def _copy_csv_piece(
+    table: str,
+    file: str,
+    start: int,
+    end: int,
+    header: bool,
+    block_size: int,
+    conn_final: dict,
+) -> dict:
+    """Copy byte range of csv file to table on own connection;
+    return stats of piece (rows, bytes, seconds, MB/s).
+    """
+
+    started = time.perf_counter()
+
+    # Connect to an existing database
+    with pool.connection(conn_final) as conn:
+        # Open a cursor to perform database operations
+        with conn.cursor() as cur:
+            #! SPECIFIC COLUMNS NOT WORKING; Open ticket with pyscopg?
+            # =================== Copy Qry ===================
+            # "COPY cust (name, age) FROM STDIN WITH (FORMAT csv)"
+
+            # If csv has header, first line is skipped
+            copy_sql = snippet.copy_from_csv_snip(table=table, header=header)
+
+            # Binary mode, byte offsets of pieces must be exact
+            with open(file, "rb") as f:
+                # see postgres copy options
+                # https://www.postgresql.org/docs/current/sql-copy.html
+                f.seek(start)
+                remaining = end - start
+
+                with cur.copy(copy_sql) as copy:
+                    # Using blocks/chunks, stop at end of piece
+                    while remaining > 0 and (
+                        data := f.read(min(block_size, remaining))
+                    ):
+                        copy.write(data)
+                        remaining -= len(data)
+
+                    # # Use write_row() for list(tuples) or iterable of sequences
+                    # #! Do not specify COPY options such as FORMAT CSV, DELIMITER, NULL
+                    # t = [("bill", 50, "here"), ("ronnie", 50, "there")]
+                    # for ff in t:
+                    #     copy.write_row(ff)
+
+            rows = cur.rowcount
+
+    seconds = time.perf_counter() - started
+
+    return {
+        "worker": threading.current_thread().name,
+        "file": str(file),
+        "start": start,
+        "end": end,
+        "rows": rows,
+        "bytes": end - start,
+        "seconds": seconds,
+        "mb_per_sec": (end - start) / 1_000_000 / seconds if seconds else 0.0,
+    }
 
 
 def copy_from_csv(
     table: str,
-    csv_file: str,
+    csv_file: str | list,
     header: bool = False,
     block_size=50_000,
+    workers: int = 1,
+    split: bool = False,
     conn_kwargs: dict = None,
-) -> None:
+) -> list[dict]:
     # TODO: Account for using other data from Iterable of sequence like list(tuples)
-    # TODO: Can i return the number of copied rows per postgres standard
     # TODO: Auto create table based on csv, use pandas(chunk), translate data types
     """Copy .csv data to table using postgres copy protocol.
 
+    Files (or pieces of one file) can be copied in parallel, each piece
+    over its own connection from a pool of threads. Each piece is
+    committed on its own; if one fails, others may already be copied.
+    Inside a session pieces are copied one by one on the session connection.
+
     Args:
         table (str): table name to run copy command on
-        csv_file (str): csv file path
+        csv_file (str | list): csv file path, glob pattern (ie 'data/*.csv') or list of paths
         header (bool): True indicates file has header and will ignore it.
+        block_size (int, optional): # of bytes sent per write. Defaults to 50_000.
+        workers (int, optional): # of pieces copied at same time, capped to
+        pool max_size. Defaults to 1.
+        split (bool, optional): Split each file at line boundaries into 'workers' byte ranges.
+        Only for csv without line breaks inside quoted values. Defaults to False.
         conn_kwargs (dict, optional): Specify/overide conn kwargs. See full list of options,
         https://www.postgresql.org/docs/current/libpq-connect.html#LIBPQ-PARAMKEYWORDS.
         Defaults to None, recommend importing via .env file.
 
     Example:
         copy_from_csv(table="heroes", csv_file='hero.csv', header=True)
+        copy_from_csv(table="heroes", csv_file='big.csv', header=True, workers=8, split=True)
 
     Returns:
-        _type_: None
+        list[dict]: stats per piece copied; worker, file, start, end, rows, bytes, seconds, mb_per_sec
+    """
+
+    # Initialize conn_kwargs to empty dict if no arguments passed
+    # Merge args into conn_final
+    if conn_kwargs is None:
+        conn_kwargs = {}
+
+    # Final connection args to pass to connect()
+    conn_final = {**conn_import, **conn_kwargs}
+
+    # Expand glob pattern or list of files
+    if isinstance(csv_file, (list, tuple)):
+        files = list(csv_file)
+    elif glob.has_magic(str(csv_file)):
+        files = sorted(glob.glob(str(csv_file)))
+    else:
+        files = [csv_file]
+
+    if not files:
+        raise ValueError(f"No csv files found matching '{csv_file}'.")
+
+    # Threads do not join session, session copies on its one connection
+    if pool.active_session.get() is not None:
+        workers = 1
+    # Workers beyond pool size would wait on a connection
+    elif pool.use_pool:
+        workers = min(workers, pool.pool_config["max_size"])
+    workers = max(workers, 1)
+
+    pieces = _csv_pieces(files, header=header, split=workers if split else 1)
+
+    def copy_piece(piece):
+        file, start, end, has_header = piece
+        return _copy_csv_piece(
+            table, file, start, end, has_header, block_size, conn_final
+        )
+
+    if workers == 1:
+        return [copy_piece(piece) for piece in pieces]
+
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="wrapg-copy"
+    ) as executor:
+        # Results in order of pieces, first error is raised
+        return list(executor.map(copy_piece, pieces))
+
+
+# ================================= Copy_to_csv Function ================================
+def copy_to_csv(
+    source: str,
+    file,
+    header: bool = True,
+    params: tuple | dict = None,
+    compression: str | None = "infer",
+    conn_kwargs: dict = None,
+) -> int:
+    """Copy table or query results to .csv file using postgres copy protocol.
+    Data is streamed block by block from server to file, no rows are held
+    in memory; compressed on the fly with gzip or zstd.
+
+    Args:
+        source (str): table name, or query starting with SELECT/WITH/VALUES/TABLE
+        file (str | PathLike | file-like): csv file path or object with write(),
+        file-like objects are left open.
+        header (bool, optional): write column names as first line. Defaults to True.
+        params (tuple | dict, optional): data for placeholders in query. Defaults to None.
+        compression (str | None, optional): "gzip", "zstd" (requires zstandard package),
+        None or "infer" from file extension (.gz, .zst). Defaults to "infer".
+        conn_kwargs (dict, optional): Specify/overide conn kwargs. See full list of options,
+        https://www.postgresql.org/docs/current/libpq-connect.html#LIBPQ-PARAMKEYWORDS.
+        Defaults to None, recommend importing via .env file.
+
+    Example:
+        copy_to_csv(source="heroes", file="heroes.csv.gz")
+        copy_to_csv(source="SELECT name FROM heroes WHERE age > %s", file=f, params=(30,))
+
+    Returns:
+        int: # of rows copied
     """
 
     # Initialize conn_kwargs to empty dict if no arguments passed
@@ -694,44 +1741,32 @@ def copy_from_csv(
         conn_kwargs = {}
 
     # Final connection args to pass to connect()
-    # Set default return type (row factory) to dictionary, can be overwritten with kwargs
     conn_final = {**conn_import, **conn_kwargs}
 
+    copy_sql = snippet.copy_to_snip(source=source, header=header)
+
     # Connect to an existing database
-    with psycopg.connect(**conn_final) as conn:
+    with pool.connection(conn_final) as conn:
         # Open a cursor to perform database operations
         with conn.cursor() as cur:
-            #! SPECIFIC COLUMNS NOT WORKING; Open ticket with pyscopg?
-            # =================== Copy Qry ===================
-            # "COPY cust (name, age) FROM STDIN WITH (FORMAT csv)"
+            with util.open_writer(file, compression=compression) as writer:
 
-            # If csv has header
-            if header:
-                copy_sql = sql.SQL(
-                    "COPY {} FROM STDIN WITH (FORMAT csv, HEADER TRUE)"
-                ).format(sql.Identifier(table))
-            else:
-                copy_sql = sql.SQL("COPY {} FROM STDIN WITH (FORMAT csv)").format(
-                    sql.Identifier(table)
-                )
+                # Text file objects need str, copy blocks are bytes
+                if isinstance(writer, io.TextIOBase):
+                    encoding = conn.info.encoding
 
-                # used for write_row(); list of tuples
-                # copy_sql = sql.SQL("COPY {} FROM STDIN").format(sql.Identifier(table))
+                    def write(data):
+                        writer.write(bytes(data).decode(encoding))
 
-            with open(csv_file, "r") as f:
-                # see postgres copy options
-                # https://www.postgresql.org/docs/current/sql-copy.html
+                else:
+                    write = writer.write
 
-                with cur.copy(copy_sql) as copy:
-                    # Using blocks/chunks
-                    while data := f.read(block_size):
-                        copy.write(data)
+                with cur.copy(copy_sql, params=params) as copy:
+                    # Blocks are written as they arrive from server
+                    for data in copy:
+                        write(data)
 
-                    # # Use write_row() for list(tuples) or iterable of sequences
-                    # #! Do not specify COPY options such as FORMAT CSV, DELIMITER, NULL
-                    # t = [("bill", 50, "here"), ("ronnie", 50, "there")]
-                    # for ff in t:
-                    #     copy.write_row(ff)
+            return cur.rowcount
 
 
 # ================================= Delete_where Function ================================
@@ -768,7 +1803,7 @@ def delete(table: str, where: dict, conn_kwargs: dict = None) -> None:
     conn_final = {**conn_import, **conn_kwargs}
 
     # Connect to an existing database
-    with psycopg.connect(**conn_final) as conn:
+    with pool.connection(conn_final) as conn:
         # Open a cursor to perform database operations
         with conn.cursor() as cur:
             # =================== Delete Qry ===================
@@ -776,13 +1811,13 @@ def delete(table: str, where: dict, conn_kwargs: dict = None) -> None:
             # WHERE condition---> id = 7 and badge in (2,4)
             # RETURNING (select_list | *);
 
-            qry = snippet.delete_snip(table=table, where=where)
-            # print(qry.as_string(conn))
+            qry = snippet.render_snip(conn, "delete", table=table, where=where)
+            # print(qry.decode())
 
-            cur.execute(query=qry)
+            # where values passed as params in order of where keys
+            cur.execute(query=qry, params=tuple(where.values()))
 
-            # Make the changes to the database persistent
-            conn.commit()
+            # Changes are committed on exit of connection context
 
 
 # ================================= Clear_table Function ================================
@@ -806,7 +1841,7 @@ def clear_table(table: str, conn_kwargs: dict = None) -> None:
     conn_final = {**conn_import, **conn_kwargs}
 
     # Connect to an existing database
-    with psycopg.connect(**conn_final) as conn:
+    with pool.connection(conn_final) as conn:
         # Open a cursor to perform database operations
         with conn.cursor() as cur:
             # =================== Delete ALL Records Qry ===================
@@ -817,5 +1852,39 @@ def clear_table(table: str, conn_kwargs: dict = None) -> None:
 
             cur.execute(query=qry)
 
-            # Make the changes to the database persistent
-            conn.commit()
+            # Changes are committed on exit of connection context
+
+
+# ================================= Prepared_statements Function ================================
+def prepared_statements(conn_kwargs: dict = None) -> int:
+    """Return # of server side prepared statements on a connection; each
+    prepared statement uses server memory for as long as connection is open.
+    Note: pooled connections each have their own prepared statements; result
+    is for whichever connection the pool hands out (not a total of the pool),
+    call on a Session for a given connection. Worst case per pool is
+    prepared_max * pool max_size. See wrapg.pool.prepare_config (global, new
+    connections only) to change when/how many statements are prepared.
+
+    Args:
+        conn_kwargs (dict, optional): Specify/overide conn kwargs. See full list of options,
+        https://www.postgresql.org/docs/current/libpq-connect.html#LIBPQ-PARAMKEYWORDS.
+        Defaults to None, recommend importing via .env file.
+
+    Returns:
+        int: # of prepared statements
+    """
+
+    # Initialize conn_kwargs to empty dict if no arguments passed
+    # Merge args into conn_final
+    if conn_kwargs is None:
+        conn_kwargs = {}
+
+    # Final conn parameters to pass to connect()
+    conn_final = {**conn_import, **conn_kwargs}
+
+    # Connect to an existing database
+    with pool.connection(conn_final) as conn:
+        # Open a cursor to perform database operations
+        with conn.cursor() as cur:
+            cur.execute(query="SELECT count(*) FROM pg_prepared_statements;")
+            return cur.fetchone()[0]